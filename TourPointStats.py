@@ -0,0 +1,245 @@
+# 관광지 입장객 통계 집계
+# TourPointVisitor_ins.py 가 지역/월별로 저장한 NDJSON(<출력 폴더>/<지역>/<yyyymm>.ndjson)을 읽어
+# 관광지(sido, gungu, resNm) x 월 크기의 외국인/내국인 방문객 수 행렬로 미리 집계해 두고,
+# 새로 받았거나 바뀐 지역/월 파일만 다시 읽어 갱신합니다.
+#
+# 사용 예:
+#   python TourPointStats.py update
+#   python TourPointStats.py monthly --by gungu --sido 서울특별시
+#   python TourPointStats.py yoy --year 2023 --by sido
+#   python TourPointStats.py top --year 2023 -n 10
+
+import os
+import sys
+import glob
+import json
+import argparse
+
+import numpy as np       # 수치 계산용 라이브러리
+
+OUTPUT_DIR = "관광지입장정보"
+STATS_DIR_NAME = "stats"
+METRICS = ('ForNum', 'NatNum', 'total')
+
+def readPartition(path):
+    # 지역/월 NDJSON 파일을 읽어 {(sido, gungu, resNm): [ForNum, NatNum]} 합계를 반환
+    # 체크포인트 기록 직전에 종료되어 두 번 기록된 행은 한 번만 셉니다.
+    rows = {}
+    with open(path, encoding='utf-8') as infile:
+        for line in infile:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # 기록 도중 종료되어 잘린 마지막 줄
+            rows[(row['sido'], row['gungu'], row['resNm'], row['rnum'])] = row
+    sums = {}
+    for (sido, gungu, resNm, _), row in rows.items():
+        counts = sums.setdefault((sido, gungu, resNm), [0, 0])
+        counts[0] += int(row['ForNum'] or 0)
+        counts[1] += int(row['NatNum'] or 0)
+    return sums
+
+class TourPointStats:
+    # 관광지 x 월 행렬로 저장한 열(column) 기반 집계 저장소.
+    # keys[i] = (sido, gungu, resNm), months[j] = 'YYYYMM' 이고, forNum[i, j] / natNum[i, j] 가 월별 방문객 수입니다.
+    # 같은 관광지-월 칸은 그 달을 받은 파일의 합계로 "덮어쓰므로" 같은 파일을 다시 읽어도 중복 집계되지 않습니다.
+
+    def __init__(self, output_dir=OUTPUT_DIR):
+        self.output_dir = output_dir
+        self.stats_dir = os.path.join(output_dir, STATS_DIR_NAME)
+        self.keys = []
+        self.months = []
+        self.forNum = np.zeros((0, 0), dtype=np.int64)
+        self.natNum = np.zeros((0, 0), dtype=np.int64)
+        self.ingested = {}  # 파일 경로 -> {'signature': [mtime_ns, size], 'keys': [행 번호, ...]}
+        self._reindex()
+        self.load()
+
+    def load(self):
+        meta_path = os.path.join(self.stats_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding='utf-8') as infile:
+            meta = json.load(infile)
+        with np.load(os.path.join(self.stats_dir, meta['matrix'])) as data:
+            self.forNum = data['forNum']
+            self.natNum = data['natNum']
+        self.keys = [tuple(key) for key in meta['keys']]
+        self.months = meta['months']
+        self.ingested = meta['ingested']
+        self._reindex()
+
+    def save(self):
+        # 행렬을 새 파일에 쓴 뒤 meta.json 을 교체하여, 저장 도중 종료되어도 이전 집계가 유지되게 합니다.
+        os.makedirs(self.stats_dir, exist_ok=True)
+        previous = self._matrixName()
+        matrix = "rollup_%d.npz" % (int(previous[7:-4]) + 1 if previous else 1)
+        np.savez(os.path.join(self.stats_dir, matrix), forNum=self.forNum, natNum=self.natNum)
+        meta_path = os.path.join(self.stats_dir, "meta.json")
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as outfile:
+            json.dump({'matrix': matrix, 'keys': self.keys, 'months': self.months,
+                       'ingested': self.ingested}, outfile, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+        if previous:
+            os.remove(os.path.join(self.stats_dir, previous))
+
+    def _matrixName(self):
+        meta_path = os.path.join(self.stats_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding='utf-8') as infile:
+            return json.load(infile)['matrix']
+
+    def _reindex(self):
+        self.keyIndex = {key: i for i, key in enumerate(self.keys)}
+        self.monthIndex = {month: j for j, month in enumerate(self.months)}
+
+    def _grow(self, keys, months):
+        # 새 관광지/월이 생기면 행렬을 넓힙니다. 월은 항상 정렬된 순서를 유지합니다.
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self.keyIndex]
+        new_months = sorted(set(months) - set(self.months))
+        if not new_keys and not new_months:
+            return
+        months_all = sorted(self.months + new_months)
+        column = [months_all.index(month) for month in self.months]
+        rows = len(self.keys) + len(new_keys)
+        for name in ('forNum', 'natNum'):
+            grown = np.zeros((rows, len(months_all)), dtype=np.int64)
+            grown[:len(self.keys), column] = getattr(self, name)
+            setattr(self, name, grown)
+        self.keys = self.keys + new_keys
+        self.months = months_all
+        self._reindex()
+
+    def update(self):
+        # 새로 받았거나 바뀐 지역/월 파일만 다시 읽어 해당 칸을 갱신합니다. 갱신한 파일 수를 반환합니다.
+        nUpdated = 0
+        for path in sorted(glob.glob(os.path.join(self.output_dir, "*", "*.ndjson"))):
+            if os.path.basename(os.path.dirname(path)) == STATS_DIR_NAME:
+                continue
+            stat = os.stat(path)
+            signature = [stat.st_mtime_ns, stat.st_size]
+            relpath = os.path.relpath(path, self.output_dir)
+            previous = self.ingested.get(relpath)
+            if previous and previous['signature'] == signature:
+                continue
+            yyyymm = os.path.splitext(os.path.basename(path))[0]
+            sums = readPartition(path)
+            self._grow(list(sums), [yyyymm])
+            j = self.monthIndex[yyyymm]
+            if previous:
+                # 다시 받은 파일에서 빠진 관광지가 있으면 이전 값을 지웁니다.
+                self.forNum[previous['keys'], j] = 0
+                self.natNum[previous['keys'], j] = 0
+            rows = [self.keyIndex[key] for key in sums]
+            if rows:
+                counts = np.array(list(sums.values()), dtype=np.int64)
+                self.forNum[rows, j] = counts[:, 0]
+                self.natNum[rows, j] = counts[:, 1]
+            self.ingested[relpath] = {'signature': signature, 'keys': rows}
+            nUpdated += 1
+        if nUpdated:
+            self.save()
+        print("갱신한 파일 %d개 (관광지 %d곳 x %d개월)" % (nUpdated, len(self.keys), len(self.months)))
+        return nUpdated
+
+    def _matrix(self, metric):
+        if metric == 'ForNum':
+            return self.forNum
+        if metric == 'NatNum':
+            return self.natNum
+        if metric == 'total':
+            return self.forNum + self.natNum
+        raise ValueError("지원하지 않는 지표: %s" % metric)
+
+    def _select(self, sido=None, gungu=None):
+        # sido / gungu 조건에 맞는 관광지 행 번호 배열
+        return np.array([i for i, key in enumerate(self.keys)
+                         if (sido is None or key[0] == sido) and (gungu is None or key[1] == gungu)], dtype=np.int64)
+
+    def _groups(self, rows, by):
+        # 관광지 행을 by('sido' | 'gungu' | 'resNm') 기준 그룹으로 묶어 (그룹 이름 리스트, 그룹 번호 배열) 반환
+        level = {'sido': 1, 'gungu': 2, 'resNm': 3}[by]
+        labels = [self.keys[i][:level] for i in rows]
+        names = sorted(set(labels))
+        index = {name: g for g, name in enumerate(names)}
+        return names, np.array([index[label] for label in labels], dtype=np.int64)
+
+    def _groupSum(self, matrix, rows, by):
+        names, group = self._groups(rows, by)
+        sums = np.zeros((len(names), matrix.shape[1]), dtype=np.int64)
+        np.add.at(sums, group, matrix[rows])
+        return names, sums
+
+    def monthlyTotals(self, by='gungu', metric='total', sido=None, gungu=None):
+        # 그룹별 월별 합계: (그룹 이름 리스트, 월 리스트, 그룹 x 월 행렬)
+        rows = self._select(sido, gungu)
+        names, sums = self._groupSum(self._matrix(metric), rows, by)
+        return names, list(self.months), sums
+
+    def _yearTotals(self, by, metric, sido, gungu, years):
+        rows = self._select(sido, gungu)
+        names, sums = self._groupSum(self._matrix(metric), rows, by)
+        year_of = np.array([int(month[:4]) for month in self.months], dtype=np.int64)
+        return names, [sums[:, year_of == year].sum(axis=1) for year in years]
+
+    def yoyGrowth(self, year, by='gungu', metric='total', sido=None, gungu=None):
+        # 그룹별 전년 대비 증감률: [(그룹 이름, 전년 합계, 올해 합계, 증감률 또는 None)]
+        names, (before, after) = self._yearTotals(by, metric, sido, gungu, (year - 1, year))
+        result = []
+        for name, b, a in zip(names, before.tolist(), after.tolist()):
+            result.append((name, b, a, (a - b) / b if b else None))
+        return result
+
+    def topAttractions(self, n=10, metric='total', year=None, sido=None, gungu=None):
+        # 기간(연도, 생략 시 전체) 방문객 수 상위 n개 관광지: [((sido, gungu, resNm), 합계)]
+        rows = self._select(sido, gungu)
+        if not len(rows):
+            return []
+        matrix = self._matrix(metric)[rows]
+        if year is not None:
+            matrix = matrix[:, [j for j, month in enumerate(self.months) if int(month[:4]) == year]]
+        totals = matrix.sum(axis=1)
+        n = min(n, len(totals))
+        # 전체를 정렬하지 않고 상위 n개만 고른 뒤 그 안에서 정렬합니다.
+        top = np.argpartition(-totals, n - 1)[:n]
+        top = top[np.argsort(-totals[top], kind='stable')]
+        return [(self.keys[rows[i]], int(totals[i])) for i in top]
+
+def main():
+    parser = argparse.ArgumentParser(description="관광지 입장객 통계 집계")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="TourPointVisitor_ins.py 의 출력 폴더")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("update", help="새로 받은 지역/월 파일을 집계에 반영")
+    for name, help_text in (("monthly", "그룹별 월별 합계"), ("yoy", "그룹별 전년 대비 증감률"), ("top", "방문객 수 상위 관광지")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--metric", choices=METRICS, default='total', help="ForNum(외국인), NatNum(내국인), total(합계)")
+        command.add_argument("--sido", help="시도 조건")
+        command.add_argument("--gungu", help="군구 조건")
+        if name != "top":
+            command.add_argument("--by", choices=('sido', 'gungu', 'resNm'), default='gungu', help="묶을 기준")
+        if name != "monthly":
+            command.add_argument("--year", type=int, required=(name == "yoy"), help="연도")
+        if name == "top":
+            command.add_argument("-n", type=int, default=10, help="관광지 수")
+    args = parser.parse_args()
+
+    stats = TourPointStats(args.output)
+    if args.command == "update":
+        stats.update()
+    elif args.command == "monthly":
+        names, months, sums = stats.monthlyTotals(args.by, args.metric, args.sido, args.gungu)
+        print("\t".join(["그룹"] + months))
+        for name, row in zip(names, sums.tolist()):
+            print("\t".join([" ".join(name)] + [str(v) for v in row]))
+    elif args.command == "yoy":
+        for name, before, after, growth in stats.yoyGrowth(args.year, args.by, args.metric, args.sido, args.gungu):
+            rate = "-" if growth is None else "%+.1f%%" % (growth * 100)
+            print("%s\t%d\t%d\t%s" % (" ".join(name), before, after, rate))
+    elif args.command == "top":
+        for rank, (key, total) in enumerate(stats.topAttractions(args.n, args.metric, args.year, args.sido, args.gungu), 1):
+            print("%d\t%s\t%d" % (rank, " ".join(key), total))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
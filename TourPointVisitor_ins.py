@@ -5,16 +5,35 @@
 
 import urllib.request
 import datetime
+import os
 import json
 import math
+import time
+import random
+import argparse
+import threading
+import concurrent.futures
 #TODO1.
 from openAPI.public_data.config import access_key
+from TourPointStats import TourPointStats
 
-def get_request_url(url):
+MAX_WORKERS = 8        # 동시에 요청할 최대 개수
+REQUEST_TIMEOUT = 10   # 요청 하나의 최대 대기 시간(초)
+RETRY_COUNT = 3        # 실패한 페이지의 재시도 횟수
+RETRY_BACKOFF = 1.0    # 재시도 대기 시간(초), 시도할 때마다 두 배로 늘어남
+RATE_LIMIT = 10        # 모든 작업을 합친 초당 최대 요청 수
+OUTPUT_DIR = "관광지입장정보"
+
+# 전국 수집용 시도 목록 (--all-sido)
+ALL_SIDO = ['서울특별시', '부산광역시', '대구광역시', '인천광역시', '광주광역시', '대전광역시',
+            '울산광역시', '세종특별자치시', '경기도', '강원도', '충청북도', '충청남도',
+            '전라북도', '전라남도', '경상북도', '경상남도', '제주특별자치도']
+
+def get_request_url(url, timeout=REQUEST_TIMEOUT):
     # TODO2.
     req = urllib.request.Request(url)
     try: #TODO3
-        response = urllib.request.urlopen(req)
+        response = urllib.request.urlopen(req, timeout=timeout)
         if response.getcode() == 200:
             print ("[%s] Url Request Success" % datetime.datetime.now())
             return response.read().decode('utf-8')
@@ -64,66 +83,236 @@ def getTourPointData(item, yyyymm, jsonResult):
                     'rnum': rnum, 'ForNum': ForNum, 'NatNum': NatNum})
     return    
 
-def main():
-    # 응답의 결과를 저장할 리스트 선언
+#[CODE 3]
+class RateLimiter:
+    # 여러 스레드가 함께 쓰는 요청 속도 제한기. 요청 사이 간격을 1/rate 초 이상으로 유지합니다.
+    def __init__(self, rate=RATE_LIMIT):
+        self.interval = 1.0 / rate
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def getTourPointPage(yyyymm, sido, gungu, nPagenum, nItems, limiter=None):
+    # 한 페이지를 받아와 (전체 데이터 수, 아이템 리스트)를 반환. 실패하면 None
+    # JSON 이 아닌 오류 응답(XML 서비스키 오류 등)이나 형식이 다른 응답도 실패로 보고 재시도합니다.
+    if limiter is not None:
+        limiter.wait()
+    try:
+        jsonData = getTourPointVisitor(yyyymm, sido, gungu, nPagenum, nItems)
+        if jsonData is None or jsonData['response']['header']['resultMsg'] != 'OK':
+            return None
+        body = jsonData['response']['body']
+        nTotal = int(body['totalCount'])
+        if nTotal == 0 or not body.get('items'):
+            return nTotal, []
+        items = body['items']['item']
+    except (ValueError, KeyError, TypeError) as e:
+        print("[%s] %s %s %s %d페이지 응답 오류: %r" % (datetime.datetime.now(), sido, gungu, yyyymm, nPagenum, e))
+        return None
+    # 아이템이 하나뿐이면 리스트가 아닌 딕셔너리로 응답합니다.
+    if isinstance(items, dict):
+        items = [items]
+    return nTotal, items
+
+def getTourPointPageWithRetry(yyyymm, sido, gungu, nPagenum, nItems, limiter=None,
+                              retries=RETRY_COUNT, backoff=RETRY_BACKOFF):
+    # 실패하면 지수 백오프(무작위 지터 포함)로 재시도. 끝내 실패하면 None
+    for attempt in range(retries + 1):
+        result = getTourPointPage(yyyymm, sido, gungu, nPagenum, nItems, limiter)
+        if result is not None:
+            return result
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.8, 1.2))
+    return None
+
+def planTourPointCrawl(regions, nStartYear, nEndYear):
+    # (sido, gungu) 목록과 연도 범위(끝 연도 포함)를 (yyyymm, sido, gungu) 작업 목록으로 펼치기
+    months = ["{0}{1:0>2}".format(str(year), str(month))
+              for year in range(nStartYear, nEndYear + 1) for month in range(1, 13)]
+    return [(yyyymm, sido, gungu) for sido, gungu in regions for yyyymm in months]
+
+def fetchTourPoints(plan, nItems, on_page, done=None, limiter=None, max_workers=MAX_WORKERS):
+    # 모든 (지역, 월)의 1페이지를 하나의 스레드 풀에서 동시에 요청해 totalCount 를 알아낸 뒤,
+    # 나머지 페이지를 같은 스레드 풀에서 요청합니다. 모든 요청은 limiter 하나로 속도를 제한합니다.
+    # 페이지가 도착할 때마다 on_page(yyyymm, sido, gungu, 페이지 번호, totalCount, 아이템 리스트)를 호출합니다.
+    # done 은 체크포인트의 {(yyyymm, sido, gungu, 페이지 번호): totalCount} 로, 이미 받은 페이지는 건너뜁니다.
+    done = done or {}
+    nFailed = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(yyyymm, sido, gungu, nPagenum):
+            future = executor.submit(getTourPointPageWithRetry, yyyymm, sido, gungu, nPagenum, nItems, limiter)
+            pending[future] = (yyyymm, sido, gungu, nPagenum)
+
+        def submit_rest(yyyymm, sido, gungu, nTotal):
+            # 전체 데이터 수를 페이지당 아이템 수로 나누고 올림하여 전체 페이지 수를 계산
+            nPage = math.ceil(nTotal / nItems)
+            for nPagenum in range(2, nPage + 1):
+                if (yyyymm, sido, gungu, nPagenum) not in done:
+                    submit(yyyymm, sido, gungu, nPagenum)
+
+        for yyyymm, sido, gungu in plan:
+            if (yyyymm, sido, gungu, 1) in done:
+                # 1페이지를 이미 받은 달은 기록된 totalCount 로 남은 페이지만 요청합니다.
+                submit_rest(yyyymm, sido, gungu, done[(yyyymm, sido, gungu, 1)])
+            else:
+                submit(yyyymm, sido, gungu, 1)
+
+        while pending:
+            finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                yyyymm, sido, gungu, nPagenum = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    # 체크포인트에 남지 않으므로 다음 실행 때 다시 요청합니다.
+                    print("[%s] %s %s %s %d페이지 요청 실패" % (datetime.datetime.now(), sido, gungu, yyyymm, nPagenum))
+                    nFailed += 1
+                    continue
+                nTotal, items = result
+                on_page(yyyymm, sido, gungu, nPagenum, nTotal, items)
+                if nPagenum == 1:
+                    submit_rest(yyyymm, sido, gungu, nTotal)
+    return nFailed
+
+#[CODE 4]
+def regionName(sido, gungu):
+    # 출력 폴더/파일 이름에 쓰는 지역 이름. 군구를 지정하지 않았으면 시도 이름만 사용
+    return "%s_%s" % (sido, gungu) if gungu else sido
+
+def partitionPath(output_dir, yyyymm, sido, gungu):
+    # 지역/월별로 나눈 NDJSON 파일 경로: <출력 폴더>/<지역>/<yyyymm>.ndjson
+    return os.path.join(output_dir, regionName(sido, gungu), yyyymm + ".ndjson")
+
+def writeTourPointPage(path, items, yyyymm):
+    # 한 페이지의 데이터를 NDJSON(한 줄에 JSON 하나)으로 해당 지역/월 파일에 바로 기록
     jsonResult = []
+    for item in items:
+        getTourPointData(item, yyyymm, jsonResult)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as outfile:
+        for row in jsonResult:
+            outfile.write(json.dumps(row, sort_keys=True, ensure_ascii=False) + "\n")
+        # 중간에 종료되어도 받은 데이터까지는 파일에 남도록 페이지마다 디스크에 기록합니다.
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    return len(jsonResult)
 
-    sido = '서울특별시'
-    gungu = ''
-    nPagenum = 1
-    nTotal = 0
-    nItems = 100
-    
-    nStartYear = 2020
-    nEndYear = 2024
-
-    # 년도를 반복
-    for year in range(nStartYear, nEndYear):
-        #월을 반복
-        for month in range(1, 13):
-            #TODO4.
-            # 연도와 월을 합쳐서 'YYYYMM'형태의 문자열을 생성
-            yyyymm = "{0}{1:0>2}".format(str(year), str(month))
-            # 페이지 번호를 초기화
-            nPagenum = 1
-
-            #[CODE 3]
-            while True:
-                # 데이터 받아오기
-                jsonData = getTourPointVisitor(yyyymm, sido, gungu, nPagenum, nItems)
-                # 응답 데이터 추출
-                if (jsonData['response']['header']['resultMsg'] == 'OK'):
-                    nTotal = jsonData['response']['body']['totalCount']
-            
-                    if nTotal == 0:
-                        break
-                    
-                    # 응답데이터에서 값을 추출하여 getTourPointData() 에 넘겨주기
-                    for item in jsonData['response']['body']['items']['item']:
-                        getTourPointData(item, yyyymm, jsonResult)
-                    # 전체 페이지 수를 계산
-                    # 전체 데이터 수를 가져와서 페이지당 아이템 수인 100으로 나누고
-                    # 그 값을 올림한 결과를 nPage 변수에 할당
-                    # nTotal은  jsonData에서 가져온 전체 데이터 수.
-                    # nTotal은 해당 기간 동안의 관광지 데이터 총 개수를 의미
-                    # 100은 한 페이지에 출력할 아이템 수
-                    # nTotal을 페이지당 아이템 수로 나누어서 전체 페이지 수를 계산하고,
-                    # 이 값을 올림하여 다음 페이지가 필요한 경우를 고려하여 nPage에 저장
-                    nPage = math.ceil(nTotal / 100)
-                    # 페이지번호가 마지막 페이지이면 반복문을 종료
-                    if (nPagenum == nPage):
-                        break
-                    # 페이지 번호를 증가
-                    nPagenum += 1
-                
-                else:
-                    break
-    
-    # TODO5.
-    with open("%s_관광지입장정보_%d_%d.json" % (sido, nStartYear, nEndYear-1), 'w', encoding='utf-8') as outfile:
+#[CODE 5]
+def loadCheckpoint(path):
+    # 체크포인트 파일(NDJSON)에서 완료된 {(yyyymm, sido, gungu, 페이지 번호): totalCount} 를 읽기
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as infile:
+        for line in infile:
+            try:
+                unit = json.loads(line)
+            except ValueError:
+                continue  # 기록 도중 종료되어 잘린 마지막 줄
+            done[(unit['yyyymm'], unit['sido'], unit['gungu'], unit['page'])] = unit['totalCount']
+    return done
+
+def writeCheckpoint(checkfile, yyyymm, sido, gungu, nPagenum, nTotal):
+    checkfile.write(json.dumps({'yyyymm': yyyymm, 'sido': sido, 'gungu': gungu,
+                                'page': nPagenum, 'totalCount': nTotal}, ensure_ascii=False) + "\n")
+    checkfile.flush()
+
+def exportPrettyJson(ndjson_paths, json_path):
+    # 지역의 월별 NDJSON 을 읽어 (yyyymm, rnum) 순서로 정렬한 보기 좋은 JSON 으로 내보내기 (선택)
+    # 체크포인트 기록 직전에 종료되어 두 번 받은 페이지는 한 번만 남깁니다.
+    rows = {}
+    for ndjson_path in ndjson_paths:
+        if not os.path.exists(ndjson_path):
+            continue
+        with open(ndjson_path, encoding='utf-8') as infile:
+            for line in infile:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                rows[(row['yyyymm'], row['sido'], row['gungu'], row['resNm'], row['rnum'])] = row
+    jsonResult = list(rows.values())
+    jsonResult.sort(key=lambda row: (row['yyyymm'], row['rnum']))
+    with open(json_path, 'w', encoding='utf-8') as outfile:
         retJson = json.dumps(jsonResult, indent=4, sort_keys=True, ensure_ascii=False)
         outfile.write(retJson)
-    print("%s_관광지입장정보_%d_%d.json SAVED" % (sido, nStartYear, nEndYear-1) )
+    print("%s SAVED" % json_path)
+
+def parseRegion(value):
+    # "시도" 또는 "시도:군구" 형식의 지역 인자를 (sido, gungu) 로 변환
+    sido, _, gungu = value.partition(':')
+    return sido.strip(), gungu.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description="관광지 입장객 통계 수집")
+    parser.add_argument("--region", action="append", type=parseRegion,
+                        help="수집할 지역 '시도' 또는 '시도:군구' (여러 번 지정 가능, 기본값: 서울특별시)")
+    parser.add_argument("--all-sido", action="store_true", help="전국 17개 시도를 모두 수집")
+    parser.add_argument("--start", type=int, default=2020, help="시작 연도")
+    parser.add_argument("--end", type=int, default=2023, help="끝 연도 (포함)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="지역/월별 NDJSON 을 저장할 폴더")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="동시 요청 수")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="초당 최대 요청 수 (전체 합계)")
+    parser.add_argument("--pretty", action="store_true", help="수집이 끝나면 지역별로 정렬된 JSON 파일도 함께 저장")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터 다시 수집")
+    args = parser.parse_args()
+
+    nItems = 100
+    nStartYear = args.start
+    nEndYear = args.end
+    if args.all_sido:
+        regions = [(sido, '') for sido in ALL_SIDO]
+    else:
+        regions = args.region or [('서울특별시', '')]
+
+    #TODO4.
+    # (지역, 'YYYYMM') 작업 목록을 만들고, 모든 지역의 월 x 페이지를 하나의 스레드 풀에서 받아오기
+    plan = planTourPointCrawl(regions, nStartYear, nEndYear)
+    print("수집 계획: 지역 %d개 x %d개월 = %d개 작업" % (len(regions), len(plan) // len(regions), len(plan)))
+
+    # TODO5.
+    # 도착한 페이지부터 지역/월별 NDJSON 파일에 바로 기록하고,
+    # 완료된 페이지는 체크포인트에 남겨 다시 실행하면 받지 못한 페이지만 요청합니다.
+    os.makedirs(args.output, exist_ok=True)
+    checkpoint_path = os.path.join(args.output, "checkpoint.ndjson")
+    if args.restart:
+        for yyyymm, sido, gungu in plan:
+            if os.path.exists(partitionPath(args.output, yyyymm, sido, gungu)):
+                os.remove(partitionPath(args.output, yyyymm, sido, gungu))
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+    done = loadCheckpoint(checkpoint_path)
+    if done:
+        print("체크포인트에서 완료된 페이지 %d개를 건너뜁니다." % len(done))
+    nRows = 0
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkfile:
+        def on_page(yyyymm, sido, gungu, nPagenum, nTotal, items):
+            nonlocal nRows
+            # 데이터를 먼저 기록한 뒤 체크포인트를 남겨, 체크포인트에 있는 페이지는 항상 저장되어 있게 합니다.
+            nRows += writeTourPointPage(partitionPath(args.output, yyyymm, sido, gungu), items, yyyymm)
+            writeCheckpoint(checkfile, yyyymm, sido, gungu, nPagenum, nTotal)
+        nFailed = fetchTourPoints(plan, nItems, on_page, done, RateLimiter(args.rate), args.workers)
+    print("%s SAVED (%d건 추가)" % (args.output, nRows))
+    if nFailed:
+        print("실패한 페이지 %d개는 다시 실행하면 이어서 받습니다." % nFailed)
+
+    # 새로 받은 지역/월만 월별 집계(TourPointStats)에 반영
+    if nRows:
+        TourPointStats(args.output).update()
+
+    # 보기 좋은 JSON 은 필요할 때만 지역별로 만듭니다. (yyyymm, rnum) 순서로 정렬되어 결과가 항상 같습니다.
+    if args.pretty:
+        for sido, gungu in regions:
+            paths = [partitionPath(args.output, yyyymm, s, g) for yyyymm, s, g in plan if (s, g) == (sido, gungu)]
+            exportPrettyJson(paths, "%s_관광지입장정보_%d_%d.json" % (regionName(sido, gungu), nStartYear, nEndYear))
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+RSS 매칭 유사도 계산 벤치마크.
+모델 다운로드 없이 합성 임베딩(뉴스 N건 × PDF M개 × 문장 S개)으로
+compute_composite_similarity(뉴스별 루프)와 compute_composite_similarity_batch(행렬 버전),
+cosine_similarity 를 측정하고 처리량과 최대 메모리를 출력합니다.
+
+사용 예:
+    python bench_similarity.py                       # 기본 크기 목록 측정
+    python bench_similarity.py --save bench.json     # 결과를 기준값으로 저장
+    python bench_similarity.py --baseline bench.json # 기준값보다 느려지면 종료 코드 1
+"""
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+import numpy as np       # 수치 계산용 라이브러리
+
+from news_core import cosine_similarity, compute_composite_similarity, compute_composite_similarity_batch
+from news_quant import STORAGE_MODES, make_test_set, quantize_pdf_data
+
+# (뉴스 N, PDF M, 문장 S)
+DEFAULT_SIZES = [(50, 5, 100), (200, 20, 300), (500, 50, 500)]
+DIM = 512
+
+def measure(func, repeat):
+    """
+    func 를 repeat 번 실행하여 가장 빠른 시간(초)과 tracemalloc 최대 메모리(바이트)를 반환합니다.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def bench_case(num_news, num_pdfs, num_sentences, storage="float32", repeat=3, include_loop=True):
+    """
+    한 크기 조합을 측정하여 결과 딕셔너리 리스트를 반환합니다.
+    루프 버전과 행렬 버전의 점수가 다르면 AssertionError 를 발생시킵니다.
+    """
+    pdf_data, headlines = make_test_set(num_pdfs, num_sentences, num_news, DIM)
+    quantize_pdf_data(pdf_data, storage)
+    case = f"N={num_news} M={num_pdfs} S={num_sentences} {storage}"
+    results = []
+
+    batch_scores, _ = compute_composite_similarity_batch(headlines, pdf_data)
+    seconds, peak = measure(lambda: compute_composite_similarity_batch(headlines, pdf_data), repeat)
+    results.append({"case": case, "path": "batch", "seconds": seconds, "peak_bytes": peak,
+                    "news_per_sec": num_news / seconds})
+
+    if include_loop:
+        loop_scores = np.array([compute_composite_similarity(h, pdf_data)[0] for h in headlines])
+        assert np.allclose(loop_scores, batch_scores, atol=1e-4), f"{case}: 루프/행렬 점수 불일치"
+        seconds, peak = measure(lambda: [compute_composite_similarity(h, pdf_data) for h in headlines], repeat)
+        results.append({"case": case, "path": "loop", "seconds": seconds, "peak_bytes": peak,
+                        "news_per_sec": num_news / seconds})
+
+    global_embeddings = [pdf['global_embedding'] for pdf in pdf_data]
+    pairs = num_news * num_pdfs
+    seconds, peak = measure(lambda: [cosine_similarity(g, h) for h in headlines for g in global_embeddings], repeat)
+    results.append({"case": case, "path": "cosine", "seconds": seconds, "peak_bytes": peak,
+                    "news_per_sec": pairs / seconds})
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    기준값 대비 처리량이 tolerance 비율 이상 떨어진 항목 목록을 반환합니다.
+    """
+    reference = {(r["case"], r["path"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        ref = reference.get((result["case"], result["path"]))
+        if ref and result["news_per_sec"] < ref["news_per_sec"] * (1 - tolerance):
+            regressions.append((result, ref))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS 매칭 유사도 계산 벤치마크 (합성 임베딩)")
+    parser.add_argument("--size", action="append", help="N,M,S 크기 (여러 번 지정 가능)")
+    parser.add_argument("--storage", choices=STORAGE_MODES, action="append", help="문장 임베딩 저장 형식")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (가장 빠른 값 사용)")
+    parser.add_argument("--no-loop", action="store_true", help="느린 루프 버전은 건너뜀")
+    parser.add_argument("--save", help="결과를 JSON 기준값으로 저장")
+    parser.add_argument("--baseline", help="비교할 JSON 기준값")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용 처리량 감소 비율")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in size.split(",")) for size in args.size] if args.size else DEFAULT_SIZES
+    results = []
+    for storage in args.storage or ["float32"]:
+        for num_news, num_pdfs, num_sentences in sizes:
+            for result in bench_case(num_news, num_pdfs, num_sentences, storage, args.repeat, not args.no_loop):
+                print(f"{result['case']:<32} {result['path']:<6} "
+                      f"{result['seconds'] * 1000:9.1f} ms  "
+                      f"{result['news_per_sec']:12.1f} /s  "
+                      f"최대 메모리 {result['peak_bytes'] / 1e6:8.2f} MB")
+                results.append(result)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print(f"{args.save} SAVED")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for result, ref in regressions:
+            print(f"성능 저하: {result['case']} {result['path']} "
+                  f"{result['news_per_sec']:.1f}/s (기준 {ref['news_per_sec']:.1f}/s)")
+        if regressions:
+            return 1
+        print("기준값 대비 성능 저하 없음.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
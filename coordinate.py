@@ -1,63 +1,193 @@
 import math
 
-def center_point(points):
-    if len(points) == 2:
-        return {
-            'x': (points[0]['x'] + points[1]['x']) / 2,
-            'y': (points[0]['y'] + points[1]['y']) / 2
-        }
-    elif len(points) > 2:
-        area = x = y = 0
-        j = len(points) - 1
-        for i in range(len(points)):
-            p1 = points[i]
-            p2 = points[j]
-            f = p1['y'] * p2['x'] - p2['y'] * p1['x']
-            x += (p1['x'] + p2['x']) * f
-            y += (p1['y'] + p2['y']) * f
-            area += f * 3
-            j = i
-        return {'x': x / area, 'y': y / area}
-    else:
-        return {'x': points[0]['x'], 'y': points[0]['y']}
-
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371e3
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
+import numpy as np
+
+def _as_points(points):
+    # [{'x': .., 'y': ..}, ...] 리스트 또는 (N, 2) 배열을 float64 (N, 2) 배열로 변환
+    if len(points) and isinstance(points[0], dict):
+        return np.array([[p['x'], p['y']] for p in points], dtype=np.float64)
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+def polygon_centroids(polygons):
+    # 여러 다각형의 무게중심과 넓이를 한 번에 계산: ((B, 2) 무게중심 배열, (B,) 넓이 배열)
+    # 다각형마다 꼭짓점 수가 달라도 되며, 좌표값이 커도 정밀도를 잃지 않도록 꼭짓점 평균을 빼고 계산합니다.
+    # 점이 1~2개이거나 넓이가 0인(일직선) 다각형은 꼭짓점 평균을 무게중심으로 사용합니다.
+    arrays = [_as_points(polygon) for polygon in polygons]
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    if not len(arrays) or (lengths == 0).any():
+        raise ValueError("빈 다각형은 무게중심을 계산할 수 없습니다.")
+    pts = np.concatenate(arrays)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    origin = np.add.reduceat(pts, starts) / lengths[:, None]
+    centered = pts - np.repeat(origin, lengths, axis=0)
+
+    # 각 꼭짓점의 다음 꼭짓점 (다각형의 마지막 꼭짓점은 첫 꼭짓점으로 이어짐)
+    nxt = np.arange(1, len(pts) + 1)
+    nxt[starts + lengths - 1] = starts
+    x1, y1 = centered[:, 0], centered[:, 1]
+    x2, y2 = centered[nxt, 0], centered[nxt, 1]
+    cross = x1 * y2 - x2 * y1
+    area2 = np.add.reduceat(cross, starts)        # 부호 있는 넓이의 두 배
+    sx = np.add.reduceat((x1 + x2) * cross, starts)
+    sy = np.add.reduceat((y1 + y2) * cross, starts)
+
+    scale = np.maximum.reduceat(np.abs(centered).max(axis=1), starts)
+    valid = np.abs(area2) > 1e-12 * np.maximum(scale, 1e-300) ** 2
+    centroid = np.zeros((len(arrays), 2))
+    centroid[valid, 0] = sx[valid] / (3 * area2[valid])
+    centroid[valid, 1] = sy[valid] / (3 * area2[valid])
+    return centroid + origin, np.abs(area2) / 2
+
+def polygon_area(points):
+    # 다각형의 넓이 (좌표 단위의 제곱)
+    return float(polygon_centroids([points])[1][0])
 
-    a = math.sin(delta_phi / 2) * math.sin(delta_phi / 2) + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) * math.sin(delta_lambda / 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    return R * c
+def center_point(points):
+    # 다각형(꼭짓점 리스트)의 무게중심. 입력이 dict 리스트이면 {'x', 'y'} dict, 배열이면 [x, y] 배열을 반환
+    centroid = polygon_centroids([points])[0][0]
+    if len(points) and isinstance(points[0], dict):
+        return {'x': float(centroid[0]), 'y': float(centroid[1])}
+    return centroid
 
-import math
+EARTH_RADIUS_M = 6371e3
 
-def get_coordinates(lat, lng, rad, stp):
-    positions = []
+def calculate_distance(lat1, lon1, lat2, lon2):
+    # 두 지점(들) 사이의 하버사인 거리(미터)
+    # 숫자 대신 배열을 넘기면 NumPy 브로드캐스팅 규칙에 따라 한 번에 계산합니다.
+    # 예: calculate_distance(lat, lng, lats[:, None], lngs[None, :]) -> (len(lats), len(lngs))
+    R = EARTH_RADIUS_M
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    a = np.clip(a, 0.0, 1.0)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    distance = R * c
+    return float(distance) if np.ndim(distance) == 0 else distance
+
+def iter_distance_blocks(points1, points2, block_rows=1024):
+    # (N, 2) 와 (M, 2) [위도, 경도] 배열의 거리 행렬을 block_rows 행씩 (시작 행, (행 수, M) 블록) 으로 내보냅니다.
+    # 임시 메모리는 block_rows x M 으로 제한됩니다.
+    points1 = np.asarray(points1, dtype=np.float64).reshape(-1, 2)
+    points2 = np.asarray(points2, dtype=np.float64).reshape(-1, 2)
+    # 두 번째 점 집합의 삼각함수 값은 한 번만 계산합니다.
+    phi2 = np.radians(points2[:, 0])
+    cos_phi2 = np.cos(phi2)
+    lambda2 = np.radians(points2[:, 1])
+    for start in range(0, len(points1), block_rows):
+        block = points1[start:start + block_rows]
+        phi1 = np.radians(block[:, 0])[:, None]
+        lambda1 = np.radians(block[:, 1])[:, None]
+        a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * cos_phi2 * np.sin((lambda2 - lambda1) / 2) ** 2
+        np.clip(a, 0.0, 1.0, out=a)
+        yield start, 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def distance_matrix(points1, points2, block_rows=1024, out=None):
+    # (N, M) 거리 행렬(미터). out 에 np.memmap 등을 넘기면 결과를 메모리에 모두 올리지 않고 채웁니다.
+    points1 = np.asarray(points1, dtype=np.float64).reshape(-1, 2)
+    points2 = np.asarray(points2, dtype=np.float64).reshape(-1, 2)
+    if out is None:
+        out = np.empty((len(points1), len(points2)))
+    for start, block in iter_distance_blocks(points1, points2, block_rows):
+        out[start:start + len(block)] = block
+    return out
+
+def k_nearest(points1, points2, k=1, block_rows=1024):
+    # points1 의 각 점에서 가장 가까운 points2 의 점 k개: ((N, k) 인덱스, (N, k) 거리), 가까운 순서
+    # 전체 거리 행렬을 만들지 않고 블록마다 상위 k개만 남깁니다.
+    points1 = np.asarray(points1, dtype=np.float64).reshape(-1, 2)
+    k = min(k, len(np.asarray(points2).reshape(-1, 2)))
+    indices = np.empty((len(points1), k), dtype=np.int64)
+    distances = np.empty((len(points1), k))
+    if k == 0:
+        return indices, distances
+    for start, block in iter_distance_blocks(points1, points2, block_rows):
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k < block.shape[1] else \
+            np.tile(np.arange(block.shape[1]), (len(block), 1))
+        nearest_dist = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_dist, axis=1, kind='stable')
+        indices[start:start + len(block)] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:start + len(block)] = np.take_along_axis(nearest_dist, order, axis=1)
+    return indices, distances
+
+def _grid_offsets(limit, step):
+    # -limit 부터 step 간격으로 limit 이하까지의 오프셋 (반복 덧셈 오차 없이 인덱스로 계산)
+    count = int(math.floor(2 * limit / step + 1e-9)) + 1
+    return -limit + step * np.arange(count)
+
+def to_dicts(points):
+    # (N, 2) [위도, 경도] 배열을 기존 형식인 [{'x': 위도, 'y': 경도}, ...] 리스트로 변환
+    return [{'x': x, 'y': y} for x, y in np.asarray(points).tolist()]
+
+def get_coordinates(lat, lng, rad, stp, as_dict=False):
+    # 중심 (lat, lng) 에서 반경 rad(미터) 안에 드는 stp(도) 간격 격자점을 (N, 2) [위도, 경도] 배열로 반환
+    # as_dict=True 이면 기존처럼 [{'x': 위도, 'y': 경도}, ...] 리스트로 반환
     radius = rad
     step_size = stp
     user_latitude = lat
     user_longitude = lng
 
-    lat_offset = -radius / 111320
+    lat_offset_limit = radius / 111320
     lon_offset_limit = radius / (111320 * math.cos(math.radians(user_latitude)))
-
-    while lat_offset <= radius / 111320:
-        lon_offset = -lon_offset_limit
-        while lon_offset <= lon_offset_limit:
-            lat = user_latitude + lat_offset
-            lng = user_longitude + lon_offset
-
-            distance = calculate_distance(user_latitude, user_longitude, lat, lng)
-            if distance <= radius:
-                positions.append({'x': lat, 'y': lng})
-            lon_offset += step_size
-        lat_offset += step_size
-
-    return positions
+    lats = user_latitude + _grid_offsets(lat_offset_limit, step_size)
+    lngs = user_longitude + _grid_offsets(lon_offset_limit, step_size)
+
+    # 하버사인 거리를 격자 전체에 한 번에 계산 (위도는 행, 경도는 열로 브로드캐스트)
+    distance = calculate_distance(user_latitude, user_longitude, lats[:, None], lngs[None, :])
+
+    rows, cols = np.nonzero(distance <= radius)
+    positions = np.column_stack((lats[rows], lngs[cols]))
+    return to_dicts(positions) if as_dict else positions
+
+def _hex_distance(centers, r, point):
+    # 꼭짓점이 위를 향한 외접반지름 r 정육각형들(중심 (M, 2))에서 point 까지의 최단 거리 (안에 있으면 0)
+    angles = np.radians(30 + 60 * np.arange(6))
+    vertices = centers[:, None, :] + r * np.column_stack((np.cos(angles), np.sin(angles)))[None, :, :]
+    a = vertices
+    b = np.roll(vertices, -1, axis=1)
+    ab = b - a
+    ap = point[None, None, :] - a
+    t = np.clip((ap * ab).sum(axis=2) / (ab * ab).sum(axis=2), 0.0, 1.0)
+    edge_distance = np.linalg.norm(ap - t[:, :, None] * ab, axis=2).min(axis=1)
+    # 꼭짓점이 반시계 방향이므로 모든 변의 왼쪽에 있으면 육각형 안
+    inside = (ab[:, :, 0] * ap[:, :, 1] - ab[:, :, 1] * ap[:, :, 0] >= 0).all(axis=1)
+    return np.where(inside, 0.0, edge_distance)
+
+def get_coverage_centers(lat, lng, rad, search_radius, as_dict=False):
+    # 중심 (lat, lng), 반경 rad(미터)인 원을 반경 search_radius(미터) 검색 원들로 빠짐없이 덮는
+    # 최소한의 검색 중심점을 (N, 2) [위도, 경도] 배열로 반환 (육각 타일링)
+    # 외접반지름이 search_radius 인 정육각형은 검색 원 안에 들어가므로, 원과 겹치는 육각형의 중심만 고르면 됩니다.
+    # get_coordinates 의 촘촘한 격자 대신 장소 검색 API 호출 지점으로 사용합니다.
+    if rad <= search_radius:
+        points = np.array([[lat, lng]], dtype=np.float64)
+        return to_dicts(points) if as_dict else points
+
+    r = search_radius
+    dx = math.sqrt(3) * r   # 같은 줄 육각형 중심 간격
+    dy = 1.5 * r            # 줄 간격
+    rows = int(math.ceil((rad + r) / dy)) + 1
+    cols = int(math.ceil((rad + r) / dx)) + 1
+    j, i = np.mgrid[-rows:rows + 1, -cols:cols + 1]
+    origin = np.zeros(2)
+    best = None
+    # 격자의 기준 위치를 조금씩 옮겨 보며 필요한 육각형 수가 가장 적은 배치를 고릅니다.
+    for shift_x in (0.0, 1 / 3, 2 / 3):
+        for shift_y in (0.0, 1 / 3, 2 / 3):
+            x = dx * (i + 0.5 * (j & 1) + shift_x)
+            y = dy * (j + shift_y)
+            centers = np.column_stack((x.ravel(), y.ravel()))
+            centers = centers[np.hypot(centers[:, 0], centers[:, 1]) <= rad + r]
+            centers = centers[_hex_distance(centers, r, origin) <= rad]
+            if best is None or len(centers) < len(best):
+                best = centers
+
+    # 중심 주변의 평면 근사(미터)를 위도/경도로 변환
+    points = np.column_stack((lat + best[:, 1] / 111320,
+                              lng + best[:, 0] / (111320 * math.cos(math.radians(lat)))))
+    return to_dicts(points) if as_dict else points
 
 def get_radius_boundary(lat, lng, radius):
     lat_change = radius / 111.32
@@ -86,10 +216,15 @@ def get_accurate_radius_boundary(lat, lon, radius):
     lat_max = lat_rad + angular_radius
 
     # 경도 경계 계산
-    # 위도에 따른 경도 변경 조정
-    lon_deg_per_km = (math.pi / 180.0) * earth_radius_km * math.cos(lat_rad)
-    lng_min = lon_rad - angular_radius / lon_deg_per_km
-    lng_max = lon_rad + angular_radius / lon_deg_per_km
+    # 위도에 따른 경도 변경 조정 (위도가 높을수록 같은 거리에 해당하는 경도 폭이 넓어짐)
+    if lat_max >= math.pi / 2 or lat_min <= -math.pi / 2:
+        # 극점을 포함하면 모든 경도가 범위에 들어감
+        lng_min = -math.pi
+        lng_max = math.pi
+    else:
+        lon_delta = math.asin(min(1.0, math.sin(angular_radius) / math.cos(lat_rad)))
+        lng_min = lon_rad - lon_delta
+        lng_max = lon_rad + lon_delta
 
     # 경계를 라디안에서 도로 변환
     lat_min = math.degrees(lat_min)
@@ -104,13 +239,15 @@ def get_accurate_radius_boundary(lat, lon, radius):
         "lng_max": lng_max
     }
 
-coordinates = get_coordinates(35.214461, 129.116741, 1000, 0.0001)
-boundary = get_radius_boundary(35.214461, 129.116741, 10)
-accurate_bound = get_accurate_radius_boundary(35.214461, 129.116741, 10)
-center = center_point(coordinates)
-
-
-print(test)
-print(test2)
-print(center)
-# print(coordinates)
\ No newline at end of file
+if __name__ == "__main__":
+    coordinates = get_coordinates(35.214461, 129.116741, 1000, 0.0001)
+    boundary = get_radius_boundary(35.214461, 129.116741, 10)
+    accurate_bound = get_accurate_radius_boundary(35.214461, 129.116741, 10)
+    center = center_point(coordinates)
+
+    coverage = get_coverage_centers(35.214461, 129.116741, 1000, 200)
+    print("격자점 %d개 / 커버리지 중심점 %d개" % (len(coordinates), len(coverage)))
+    print(boundary)
+    print(accurate_bound)
+    print(center)
+    # print(coordinates)
\ No newline at end of file
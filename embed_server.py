@@ -0,0 +1,208 @@
+"""
+문장 임베딩 공유 서비스.
+Universal Sentence Encoder 를 한 번만 로드하고, 여러 호출자(GUI 스레드, 헤드리스 작업)의
+요청을 큐에 모아 최대 지연 시간 안에서 동적 마이크로 배치로 묶어 처리합니다.
+
+같은 프로세스에서는 BatchingEmbedder 를 그대로 쓰고, 다른 프로세스에서는
+Unix 소켓 서버(python embed_server.py)에 RemoteEmbedder 로 접속합니다.
+
+사용 예:
+    python embed_server.py --socket /tmp/news_embed.sock
+"""
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import concurrent.futures
+
+import numpy as np       # 수치 계산용 라이브러리
+
+from news_core import load_embed_model, to_numpy
+
+EMBED_SOCKET = os.environ.get("NEWS_EMBED_SOCKET", "/tmp/news_embed.sock")
+
+ERROR_MARK = 0xFFFFFFFF
+
+class BatchingEmbedder:
+    """
+    embed(texts) 와 같은 방식으로 호출할 수 있는 스레드 안전 배칭 래퍼.
+    첫 요청이 들어온 뒤 max_latency 초 동안, 또는 max_batch_size 개의 문장이 모일 때까지
+    다른 요청을 기다렸다가 모델을 한 번에 호출합니다. 결과는 float32 numpy 배열입니다.
+    """
+
+    def __init__(self, embed, max_batch_size=256, max_latency=0.01):
+        self.embed = embed
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="BatchingEmbedder", daemon=True)
+        self.thread.start()
+
+    def __call__(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        future = concurrent.futures.Future()
+        self.queue.put((texts, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            texts, future = self.queue.get()
+            batch = [(texts, future)]
+            size = len(texts)
+            deadline = time.monotonic() + self.max_latency
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._process(batch)
+
+    def _process(self, batch):
+        """
+        모인 요청을 이어 붙여 max_batch_size 단위로 모델을 호출하고, 결과를 요청별로 나눠 돌려줍니다.
+        """
+        all_texts = [text for texts, _ in batch for text in texts]
+        try:
+            parts = [
+                to_numpy(self.embed(all_texts[start:start + self.max_batch_size]))
+                for start in range(0, len(all_texts), self.max_batch_size)
+            ]
+            vectors = np.concatenate(parts).astype(np.float32, copy=False)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for texts, future in batch:
+            future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+def recv_exact(sock, size):
+    """
+    소켓에서 정확히 size 바이트를 읽습니다. 연결이 끊기면 ConnectionError 를 발생시킵니다.
+    """
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("임베딩 서버 연결이 끊어졌습니다.")
+        buf.extend(chunk)
+    return bytes(buf)
+
+class EmbedRequestHandler(socketserver.BaseRequestHandler):
+    """
+    요청: [u32 길이][JSON {"texts": [...]}]
+    응답: [u32 행 수][u32 차원][float32 행렬] 또는 [0xFFFFFFFF][u32 길이][오류 메시지]
+    한 연결에서 여러 요청을 차례로 처리합니다.
+    """
+
+    def handle(self):
+        while True:
+            try:
+                (length,) = struct.unpack("!I", recv_exact(self.request, 4))
+                texts = json.loads(recv_exact(self.request, length).decode("utf-8"))["texts"]
+            except (ConnectionError, OSError):
+                return
+            try:
+                vectors = self.server.embedder(texts)
+                rows, dim = vectors.shape
+                self.request.sendall(struct.pack("!II", rows, dim) + vectors.tobytes())
+            except Exception as e:
+                message = str(e).encode("utf-8")
+                self.request.sendall(struct.pack("!II", ERROR_MARK, len(message)) + message)
+
+class EmbedServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, embedder):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, EmbedRequestHandler)
+        self.embedder = embedder
+
+class RemoteEmbedder:
+    """
+    embed_server.py 로 띄운 임베딩 서버에 접속하는 클라이언트. embed(texts) 와 같은 방식으로 호출합니다.
+    연결 하나를 잠금으로 공유하고, 끊어지면 한 번 다시 접속합니다.
+    """
+
+    def __init__(self, socket_path=EMBED_SOCKET, timeout=60):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock = None
+        self._connect()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+    def _request(self, payload):
+        self.sock.sendall(struct.pack("!I", len(payload)) + payload)
+        rows, dim = struct.unpack("!II", recv_exact(self.sock, 8))
+        if rows == ERROR_MARK:
+            raise RuntimeError(recv_exact(self.sock, dim).decode("utf-8"))
+        data = recv_exact(self.sock, rows * dim * 4)
+        return np.frombuffer(data, dtype=np.float32).reshape(rows, dim)
+
+    def __call__(self, texts):
+        payload = json.dumps({"texts": list(texts)}, ensure_ascii=False).encode("utf-8")
+        with self.lock:
+            try:
+                return self._request(payload)
+            except (ConnectionError, OSError):
+                self.sock.close()
+                self._connect()
+                return self._request(payload)
+
+def load_shared_embedder(socket_path=EMBED_SOCKET):
+    """
+    임베딩 서버가 떠 있으면 접속하고, 없으면 이 프로세스에서 모델을 로드해 배칭 래퍼로 감쌉니다.
+    """
+    if socket_path and os.path.exists(socket_path):
+        try:
+            embedder = RemoteEmbedder(socket_path)
+            print(f"임베딩 서버 사용: {socket_path}")
+            return embedder
+        except OSError as e:
+            print(f"임베딩 서버 접속 실패, 로컬 모델을 사용합니다: {e}")
+    return BatchingEmbedder(load_embed_model())
+
+def main():
+    """
+    모델을 로드하고 Unix 소켓에서 임베딩 요청을 처리합니다.
+    """
+    parser = argparse.ArgumentParser(description="마이크로 배칭 문장 임베딩 서버")
+    parser.add_argument("--socket", default=EMBED_SOCKET, help="Unix 소켓 경로")
+    parser.add_argument("--batch", type=int, default=256, help="최대 배치 크기(문장 수)")
+    parser.add_argument("--latency", type=float, default=0.01, help="배치를 모으는 최대 대기 시간(초)")
+    args = parser.parse_args()
+
+    embedder = BatchingEmbedder(load_embed_model(), args.batch, args.latency)
+    server = EmbedServer(args.socket, embedder)
+    print(f"임베딩 서버 시작: {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,79 +3,42 @@ if not os.path.exists("static"):
     os.makedirs("static")
 
 import sys
-import glob
-import re
-import time
-import datetime
-import requests
-import feedparser        # RSS 피드 파싱용 라이브러리
-import numpy as np       # 수치 계산용 라이브러리
-import tensorflow as tf  # TensorFlow 라이브러리 (모델 로딩 및 연산)
-import tensorflow_hub as hub  # TensorFlow Hub에서 모델 불러오기용 라이브러리
-import fitz              # PyMuPDF: PDF 파일에서 텍스트 추출용
-
-from urllib.parse import quote
+
+from news_core import (
+    EMBEDDING_STORAGE, REGIONS, TopArticles, embed_pdf_files, filter_digest_window, format_digest_message, merge_pdf_data
+)
+from embed_server import load_shared_embedder
+from news_fetch import FeedFetcher, LinkResolver, resolve_articles
+from news_store import SeenArticleStore, score_articles_cached
+from telegram_queue import TelegramOutbox
+from news_corpus import CORPUS_DIR, corpus_changes, open_corpus, write_corpus
+from pdf_watch import PDFFolderWatcher
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout,
     QComboBox, QListWidget, QSplitter, QProgressBar
 )
-from PyQt5.QtCore import Qt, QUrl, QThread, pyqtSignal
-from PyQt5.QtWebEngineWidgets import QWebEngineView  # 웹 페이지 렌더링 위젯
-
-# 텔레그램 봇 정보 (실제 값으로 변경)
-TELEGRAM_BOT_TOKEN = "7763945499:AAHBg1GbFHL6GUYq5NW_2bbXo4QbpGKxtKU"
-TELEGRAM_CHAT_ID = "7588489578"
-
-def load_pdf_text(pdf_path):
-    try:
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
-    except Exception as e:
-        print(f"PDF 로딩 오류: {e}")
-        return ""
-
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-def extract_company_name(text):
-    patterns = [
-        r"회사명[:：]\s*([^\n,，]+)",
-        r"주식회사\s*([^\n,，]+)",
-        r"유한회사\s*([^\n,，]+)",
-        r"([^\n,，]+)\s*주식회사",
-        r"([^\n,，]+)\s*유한회사"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            company = match.group(1).strip()
-            print("추출된 회사명:", company)
-            return company
-    sentences = re.split(r'[.?!]\s+', text)
-    if sentences:
-        company = sentences[0].strip()
-        print("첫 문장을 회사명으로 사용:", company)
-        return company
-    return ""
-
-def send_telegram_message(message, bot_token, chat_id):
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    payload = {"chat_id": chat_id, "text": message, "parse_mode": "HTML"}
-    response = requests.post(url, data=payload)
-    print("텔레그램 전송 응답:", response.json())
-    return response.json()
-
-def sanitize_keyword(keyword):
-    sanitized_keyword = re.sub(r'[\r\n]+', ' ', keyword).strip()
-    return quote(sanitized_keyword)
+from PyQt5.QtCore import Qt, QUrl, QThread, QTimer, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile  # 웹 페이지 렌더링 위젯
+
+WEB_CACHE_DIR = os.path.abspath(os.path.join("static", "web_cache"))
+PREFETCH_COUNT = 5  # 채점 후 미리 불러올 상위 기사 수
+PREFETCH_TIMEOUT_MS = 20000  # 미리 불러오기 한 건의 최대 대기 시간
+
+def top_candidates(articles, count):
+    """
+    유사도 상위(채점 전이면 앞쪽) 기사 count 건을 반환합니다.
+    """
+    if articles and 'similarity' in articles[0]:
+        top = TopArticles(count)
+        top.extend(articles)
+        return top.top()
+    return articles[:count]
 
 class PDFEmbeddingWorker(QThread):
     finished = pyqtSignal(list)
+    progress = pyqtSignal(str, int, int, int, int)  # 파일, 완료 페이지, 페이지 수, 완료 파일, 파일 수
 
     def __init__(self, file_paths, embed):
         super().__init__()
@@ -83,34 +46,47 @@ class PDFEmbeddingWorker(QThread):
         self.embed = embed
 
     def run(self):
-        pdf_data = []
-        for file_path in self.file_paths:
-            text = load_pdf_text(file_path)
-            if text:
-                global_embedding = self.embed([text])[0]
-                sentences = re.split(r'[.?!]\s+', text)
-                sentences = [s.strip() for s in sentences if s.strip()]
-                if sentences:
-                    sentence_embeddings = self.embed(sentences)
-                    print(f"{file_path}: 총 {len(sentences)}개의 문장 임베딩 업데이트 완료.")
-                    for i, sentence in enumerate(sentences):
-                        emb_vector = sentence_embeddings[i].numpy() if hasattr(sentence_embeddings[i], "numpy") else sentence_embeddings[i]
-                        print(f"문장 {i+1}: {sentence}")
-                        print(f"임베딩: {emb_vector[:5]} ...\n")
-                else:
-                    sentence_embeddings = None
-                    print(f"{file_path}: 문장을 추출하지 못했습니다.")
-                pdf_data.append({
-                    'file_path': file_path,
-                    'text': text,
-                    'global_embedding': global_embedding,
-                    'sentence_embeddings': sentence_embeddings
-                })
-            else:
-                print(f"{file_path}에서 텍스트 추출 실패.")
+        # 오류가 나도 finished 를 보내야 embedding_busy 가 풀려 이후 폴더 변경이 계속 처리됩니다.
+        try:
+            pdf_data = embed_pdf_files(self.file_paths, self.embed, progress_callback=self.progress.emit)
+        except Exception as e:
+            print(f"PDF 임베딩 오류: {e}")
+            pdf_data = []
         self.finished.emit(pdf_data)
 
+class NewsFetchWorker(QThread):
+    finished = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, fetcher, resolver, keywords, regions, store, embed, pdf_data):
+        super().__init__()
+        self.fetcher = fetcher
+        self.resolver = resolver
+        self.keywords = keywords
+        self.regions = regions
+        self.store = store
+        self.embed = embed
+        self.pdf_data = pdf_data
+
+    def run(self):
+        # 오류가 나도 finished 를 보내야 검색 버튼과 진행률 표시줄이 원래대로 돌아옵니다.
+        try:
+            articles = self.fetcher.fetch_all(self.keywords, self.regions, progress_callback=self.progress.emit)
+            # 언론사 URL 해석은 기사마다 요청이 필요하므로, 텔레그램 후보가 되는 다이제스트 기간의 기사만 먼저 해석합니다.
+            articles = resolve_articles(articles, self.resolver, filter_digest_window(articles))
+            # 새 기사만 임베딩하고, 이미 본 기사는 저장된 유사도를 재사용합니다.
+            if self.pdf_data:
+                articles = score_articles_cached(self.store, articles, self.embed, self.pdf_data)
+            # 미리 불러올 상위 기사도 언론사 URL로 해석해 둡니다.
+            articles = resolve_articles(articles, self.resolver, top_candidates(articles, PREFETCH_COUNT))
+        except Exception as e:
+            print(f"뉴스 조회 오류: {e}")
+            articles = []
+        self.finished.emit(articles)
+
 class MainWindow(QMainWindow):
+    pdf_folder_changed = pyqtSignal(list, list)  # 추가/변경된 PDF, 삭제된 PDF (감시 스레드 -> GUI 스레드)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("구글 뉴스 RSS 검색기 (회사 관련 뉴스 필터링)")
@@ -119,9 +95,7 @@ class MainWindow(QMainWindow):
         # ───────────────────────────────────────────────
         # (1) TensorFlow Hub 모델 로딩 및 데이터 초기화
         # ───────────────────────────────────────────────
-        print("TensorFlow Hub 모델 로딩 중...")
-        self.embed = hub.load("https://tfhub.dev/google/universal-sentence-encoder/4")
-        print("모델 로드 완료.")
+        self.embed = load_shared_embedder()
         self.pdf_data = []  # 여러 PDF 파일의 데이터를 저장
 
         # ───────────────────────────────────────────────
@@ -140,7 +114,7 @@ class MainWindow(QMainWindow):
         top_layout = QHBoxLayout()
         self.keyword_label = QLabel("검색어:")
         self.keyword_input = QLineEdit()
-        self.keyword_input.setPlaceholderText("예: 테슬라, 아이폰 ...")
+        self.keyword_input.setPlaceholderText("예: 테슬라, 아이폰 ... (쉼표로 여러 검색어)")
         self.region_label = QLabel("지역:")
         self.region_combo = QComboBox()
         self.region_combo.addItem("한국 (ko)", ("ko", "KR", "KR:ko"))
@@ -148,6 +122,7 @@ class MainWindow(QMainWindow):
         self.region_combo.addItem("일본 (ja)", ("ja", "JP", "JP:ja"))
         self.region_combo.addItem("영국 (en-GB)", ("en-GB", "GB", "GB:en-GB"))
         self.region_combo.addItem("프랑스 (fr)", ("fr", "FR", "FR:fr"))
+        self.region_combo.addItem("한국+미국+일본", [REGIONS["KR"], REGIONS["US"], REGIONS["JP"]])
         self.search_button = QPushButton("검색")
         self.search_button.clicked.connect(self.fetch_news)
         top_layout.addWidget(self.keyword_label)
@@ -163,6 +138,24 @@ class MainWindow(QMainWindow):
         self.news_list.currentRowChanged.connect(self.show_selected_news_detail)
         self.detail_view = QWebEngineView()
         self.detail_view.setMinimumSize(600, 400)
+        # 디스크 HTTP 캐시를 쓰는 프로필: 미리 불러온 기사와 재방문 페이지를 캐시에서 바로 표시합니다.
+        self.web_profile = QWebEngineProfile("news", self)
+        self.web_profile.setCachePath(WEB_CACHE_DIR)
+        self.web_profile.setPersistentStoragePath(WEB_CACHE_DIR)
+        self.web_profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        self.web_profile.setHttpCacheMaximumSize(512 * 1024 * 1024)
+        self.detail_view.setPage(QWebEnginePage(self.web_profile, self.detail_view))
+        # 화면에 보이지 않는 페이지로 상위 기사를 차례로 불러와 캐시를 채웁니다.
+        self.prefetch_page = QWebEnginePage(self.web_profile, self)
+        self.prefetch_page.setAudioMuted(True)  # 보이지 않는 페이지의 동영상/오디오가 소리 내지 않도록
+        self.prefetch_page.loadFinished.connect(self.on_prefetch_finished)
+        # loadFinished 가 오지 않는 페이지가 있어도 다음 기사로 넘어가도록 한 건마다 시간 제한을 둡니다.
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.prefetch_next)
+        self.prefetch_queue = []
+        self.prefetch_loading = False
+        self.prefetched_urls = set()
         splitter.addWidget(self.news_list)
         splitter.addWidget(self.detail_view)
         splitter.setStretchFactor(0, 3)
@@ -171,35 +164,104 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(splitter)
 
         self.articles = []
+        self.top_n = 3  # 유사도 채점 시 텔레그램으로 보낼 상위 기사 수
+        # 구글 뉴스 링크는 텔레그램 후보와 미리 불러올 기사만 언론사 URL로 해석합니다(resolved_links.db 에 캐시).
+        self.fetcher = FeedFetcher()
+        self.resolver = LinkResolver()
+        self.store = SeenArticleStore()
+        self.outbox = TelegramOutbox()
 
-        # 애플리케이션 실행 시 data/ 폴더 내의 PDF 파일을 자동으로 읽어옵니다.
+        # 애플리케이션 실행 시 data/ 폴더 내의 PDF 파일을 자동으로 읽어오고, 이후 변경을 감시합니다.
+        self.embedding_busy = False
+        self.pending_pdf_paths = set()
+        self.pdf_folder_changed.connect(self.on_pdf_folder_changed)
         self.load_data_pdf_files()
 
     def load_data_pdf_files(self):
         """
-        data/ 폴더 내의 모든 PDF 파일을 읽어와 임베딩 계산을 수행합니다.
+        corpus/ 에 저장된 임베딩을 매핑하고, data/ 폴더에서 새로 추가되거나 바뀐 PDF만 임베딩한 뒤 폴더 감시를 시작합니다.
         """
         data_folder = "data"
-        file_paths = glob.glob(os.path.join(data_folder, "*.pdf"))
-        if file_paths:
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setRange(0, 0)  # 진행률 무한대
-            self.worker = PDFEmbeddingWorker(file_paths, self.embed)
-            self.worker.finished.connect(self.on_pdf_embeddings_finished)
-            self.worker.start()
-        else:
+        self.corpus_dir = CORPUS_DIR
+        meta, cached = open_corpus(self.corpus_dir)
+        try:
+            self.pdf_data, changed, snapshot = corpus_changes(meta, cached, data_folder, EMBEDDING_STORAGE)
+        except ValueError as e:
+            # 다이제스트가 다른 저장 형식으로 만든 corpus 이면 덮어쓰지 않고, 이 창에서만 쓰는 임베딩을 만듭니다.
+            print(f"{e}\n공유 corpus 를 쓰지 않고 메모리에서만 임베딩합니다.")
+            self.corpus_dir = None
+            cached = []
+            self.pdf_data, changed, snapshot = corpus_changes(None, cached, data_folder, EMBEDDING_STORAGE)
+        if changed:
+            self.start_pdf_embedding(changed)
+        elif len(self.pdf_data) != len(cached):
+            self.save_corpus()  # 삭제된 PDF만 있는 경우
+        if not snapshot:
             print("data 폴더에 PDF 파일이 없습니다.")
+        # 감시 스레드의 콜백은 시그널을 통해 GUI 스레드에서 처리됩니다.
+        self.pdf_watcher = PDFFolderWatcher(data_folder, self.pdf_folder_changed.emit, snapshot=snapshot)
+        self.pdf_watcher.start()
+
+    def save_corpus(self):
+        """
+        현재 pdf_data 를 공유 corpus 에 저장합니다. 공유 corpus 를 쓰지 않는 경우(저장 형식 불일치)에는 건너뜁니다.
+        """
+        if self.corpus_dir is not None:
+            write_corpus(self.pdf_data, self.corpus_dir)
+
+    def start_pdf_embedding(self, file_paths):
+        """
+        주어진 PDF 파일들만 백그라운드에서 임베딩합니다.
+        """
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, len(file_paths))
+        self.progress_bar.setValue(0)
+        self.embedding_busy = True
+        self.worker = PDFEmbeddingWorker(file_paths, self.embed)
+        self.worker.progress.connect(self.on_pdf_progress)
+        self.worker.finished.connect(self.on_pdf_embeddings_finished)
+        self.worker.start()
+
+    def on_pdf_folder_changed(self, changed, removed):
+        """
+        PDFFolderWatcher 가 변경을 감지하면 호출되는 슬롯.
+        삭제된 PDF는 바로 빼고, 추가/변경된 PDF만 다시 임베딩합니다. 임베딩 중이면 끝난 뒤 이어서 처리합니다.
+        """
+        if removed:
+            self.pdf_data = merge_pdf_data(self.pdf_data, removed=removed)
+            self.pending_pdf_paths.difference_update(removed)
+            self.save_corpus()
+            print(f"삭제된 PDF {len(removed)}개를 임베딩 목록에서 제거했습니다.")
+        self.pending_pdf_paths.update(changed)
+        if self.pending_pdf_paths and not self.embedding_busy:
+            file_paths = sorted(self.pending_pdf_paths)
+            self.pending_pdf_paths.clear()
+            self.start_pdf_embedding(file_paths)
+
+    def on_pdf_progress(self, file_path, pages_done, page_count, files_done, files_total):
+        """
+        PDF 추출 진행률(파일 단위/페이지 단위)을 진행률 표시줄에 반영합니다.
+        """
+        self.progress_bar.setValue(files_done)
+        self.progress_bar.setFormat(f"{files_done}/{files_total} 파일 - {os.path.basename(file_path)} {pages_done}/{page_count}쪽")
 
     def on_pdf_embeddings_finished(self, pdf_data):
         """
-        PDFEmbeddingWorker 작업 완료 후 호출되는 슬롯.
+        PDFEmbeddingWorker 작업 완료 후 호출되는 슬롯. 임베딩한 PDF만 기존 목록에 추가/교체합니다.
         """
-        self.pdf_data = pdf_data
+        self.embedding_busy = False
+        # 임베딩하는 동안 삭제된 파일은 다시 넣지 않습니다.
+        updated = [pdf for pdf in pdf_data if os.path.exists(pdf['file_path'])]
+        self.pdf_data = merge_pdf_data(self.pdf_data, updated)
+        self.save_corpus()
         self.progress_bar.setVisible(False)
-        if self.pdf_data:
-            print("모든 PDF 파일 업로드 및 임베딩 업데이트 완료.")
+        self.progress_bar.resetFormat()
+        if updated:
+            print(f"PDF {len(updated)}개 임베딩 업데이트 완료 (전체 {len(self.pdf_data)}개).")
         else:
             print("선택한 PDF들에서 텍스트 추출 실패.")
+        if self.pending_pdf_paths:
+            self.on_pdf_folder_changed([], [])
 
     def fetch_news(self):
         """
@@ -207,59 +269,98 @@ class MainWindow(QMainWindow):
         GUI에는 전체 기사 목록을 표시하고, 텔레그램 전송 시에만 오늘 기준 전날 21시 ~ 오늘 오전 9시 사이의 기사만 전송합니다.
         """
         # 사용자가 검색어를 입력하지 않으면 PDF에서 추출한 회사명을 사용
-        keyword = self.keyword_input.text().strip()
-        if not keyword and self.pdf_data:
-            keyword = extract_company_name(self.pdf_data[0]['text'])
-            print("자동 추출 검색어:", keyword)
-        if not keyword:
+        keywords = [k.strip() for k in self.keyword_input.text().split(",") if k.strip()]
+        if not keywords and self.pdf_data:
+            keywords = [self.pdf_data[0]['company']]
+            print("자동 추출 검색어:", keywords[0])
+        if not keywords:
             print("검색어가 없습니다.")
             return
 
-        sanitized_keyword = sanitize_keyword(keyword)
-        region_info = self.region_combo.currentData()
-        rss_url = f"https://news.google.com/rss/search?q={sanitized_keyword}&hl={region_info[0]}&gl={region_info[1]}&ceid={region_info[2]}"
-        print("RSS URL:", rss_url)
-        feed = feedparser.parse(rss_url)
+        regions = self.region_combo.currentData()
+        if isinstance(regions, tuple):
+            regions = [regions]
+
+        # RSS 조회는 백그라운드 스레드에서 수행하여 UI가 멈추지 않도록 합니다.
+        self.search_button.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, len(keywords) * len(regions))
+        self.progress_bar.setValue(0)
+        self.fetch_worker = NewsFetchWorker(self.fetcher, self.resolver, keywords, regions,
+                                            self.store, self.embed, self.pdf_data)
+        self.fetch_worker.progress.connect(lambda done, total: self.progress_bar.setValue(done))
+        self.fetch_worker.finished.connect(self.on_news_fetched)
+        self.fetch_worker.start()
+
+    def on_news_fetched(self, articles):
+        """
+        NewsFetchWorker 작업 완료 후 호출되는 슬롯.
+        """
+        self.search_button.setEnabled(True)
+        self.progress_bar.setVisible(False)
 
         # GUI에 전체 기사 표시
-        self.articles = []
+        self.articles = articles
         self.news_list.clear()
-        for entry in feed.entries:
-            article = {
-                'title': entry.title,
-                'link': entry.link,
-                'published': entry.published,
-                'summary': entry.summary,
-                'published_parsed': entry.get('published_parsed', None)
-            }
-            self.articles.append(article)
-            self.news_list.addItem(entry.title)
-
-        # 텔레그램 전송 시에만 시간 필터 적용 (전날 21시 ~ 오늘 오전 9시)
-        filtered_articles = []
-        today_date = datetime.date.today()
-        lower_bound = datetime.datetime.combine(today_date - datetime.timedelta(days=1), datetime.time(21, 0, 0))
-        upper_bound = datetime.datetime.combine(today_date, datetime.time(9, 0, 0))
         for article in self.articles:
-            pub_parsed = article.get('published_parsed')
-            if pub_parsed:
-                pub_date = datetime.datetime.fromtimestamp(time.mktime(pub_parsed))
-                print(f"뉴스 발행 시간: {pub_date} (조건: {lower_bound} ~ {upper_bound})")
-                if lower_bound <= pub_date <= upper_bound:
-                    filtered_articles.append(article)
+            if 'similarity' in article:
+                self.news_list.addItem(f"{article['title']} (sim={article['similarity']:.2f})")
+            else:
+                self.news_list.addItem(article['title'])
+
+        # 텔레그램 전송 시에만 시간 필터 적용 (전날 21시 ~ 오늘 오전 9시), 이미 보낸 기사는 제외
+        filtered_articles = self.store.filter_unsent(filter_digest_window(self.articles))
+        self.prefetch_articles()
+
+        if filtered_articles and 'similarity' in filtered_articles[0]:
+            # PDF 유사도가 있으면 전체를 정렬하지 않고 상위 top_n 건만 힙으로 고릅니다.
+            top = TopArticles(self.top_n)
+            top.extend(filtered_articles)
+            filtered_articles = top.top()
         if filtered_articles:
             self.send_top_articles_via_telegram(filtered_articles)
         else:
             print("텔레그램으로 전송할 조건에 맞는 뉴스 기사가 없습니다.")
 
+    def prefetch_articles(self):
+        """
+        유사도 상위(채점 전이면 앞쪽) 기사들의 언론사 URL을
+        숨은 페이지로 미리 불러와 웹뷰 디스크 캐시를 채웁니다.
+        """
+        candidates = top_candidates(self.articles, PREFETCH_COUNT)
+        urls = [a.get('canonical_link') or a['link'] for a in candidates]
+        self.prefetch_queue = [url for url in urls if url not in self.prefetched_urls]
+        self.prefetched_urls.update(self.prefetch_queue)
+        if self.prefetch_queue and not self.prefetch_loading:
+            self.prefetch_next()
+
+    def on_prefetch_finished(self, ok):
+        """
+        숨은 페이지의 로딩이 끝나면 다음 기사로 넘어갑니다. 시간 제한으로 이미 넘어간 뒤의 늦은 알림은 무시합니다.
+        """
+        if self.prefetch_timer.isActive():
+            self.prefetch_next()
+
+    def prefetch_next(self):
+        """
+        대기 중인 다음 기사를 숨은 페이지로 불러옵니다. 대기열이 비면 멈춥니다.
+        """
+        self.prefetch_timer.stop()
+        self.prefetch_loading = bool(self.prefetch_queue)
+        if self.prefetch_queue:
+            self.prefetch_page.load(QUrl(self.prefetch_queue.pop(0)))
+            self.prefetch_timer.start(PREFETCH_TIMEOUT_MS)
+        else:
+            self.prefetch_page.triggerAction(QWebEnginePage.Stop)
+
     def show_selected_news_detail(self, index):
         """
         뉴스 리스트에서 선택된 항목의 상세 내용을 웹뷰에 표시합니다.
-        여기서는 기사 원문 페이지를 QWebEngineView를 사용해 로드합니다.
+        언론사 URL이 해석된 기사는 그 URL을 바로 불러와 캐시된 페이지를 사용합니다.
         """
         if 0 <= index < len(self.articles):
             article = self.articles[index]
-            self.detail_view.load(QUrl(article['link']))
+            self.detail_view.load(QUrl(article.get('canonical_link') or article['link']))
         else:
             self.detail_view.setHtml("<html><body>뉴스 기사를 선택하세요.</body></html>")
 
@@ -271,13 +372,9 @@ class MainWindow(QMainWindow):
             print("전송할 뉴스 기사가 없습니다.")
             return
 
-        message_lines = ["<b>Filtered News Articles (전날 21시 ~ 오늘 오전 9시):</b>"]
-        for idx, article in enumerate(articles, start=1):
-            line = (f"{idx}. {article['title']}\n"
-                    f"Link: {article['link']}")
-            message_lines.append(line)
-        message = "\n\n".join(message_lines)
-        send_telegram_message(message, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+        message = format_digest_message(articles)
+        self.outbox.enqueue(message)
+        self.store.mark_sent(articles)
 
 def main():
     """
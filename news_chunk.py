@@ -0,0 +1,137 @@
+"""
+회사소개서 PDF 텍스트를 임베딩용 청크로 나누는 모듈.
+줄바꿈, 글머리 기호, 길이 제한을 고려하여 문장을 묶거나 자르고,
+반복되는 머리말/꼬리말 같은 중복 청크를 임베딩 전에 제거합니다.
+"""
+import re
+
+MIN_CHUNK_CHARS = 20
+MAX_CHUNK_CHARS = 300
+
+# 글머리 기호: •, ·, ■, ▶, -, *, ※, ①, 1. 1) (1) 가. 등
+BULLET_RE = re.compile(
+    r"^\s*(?:[•·∙◦‣▪▫■□●○◆◇▶▷►▸※\-–—*]+|[①-⑳]|\(?\d{1,2}[.)]|\(?(?P<hangul>[가나다라마바사아자차카타파하])[.)])\s+"
+)
+# 장식이 붙은 페이지 번호 줄: "- 3 -", "3 / 20", "page 3", "p. 3"
+# 숫자만 있는 줄("3", "2015")은 표 칸이나 연혁 연도일 수 있어 내용으로 남깁니다.
+PAGE_NUMBER_RE = re.compile(
+    r"^\s*(?:(?:page|p\.)\s*\d{1,4}|[-–]\s*\d{1,4}\s*[-–]|\d{1,4}\s*/\s*\d{1,4})\s*$", re.IGNORECASE
+)
+SENTENCE_END_RE = re.compile(r"(?<=[.?!。])\s+")
+WHITESPACE_RE = re.compile(r"\s+")
+DIGITS_RE = re.compile(r"\d+")
+HANGUL_MARKERS = "가나다라마바사아자차카타파하"
+
+def normalize_chunk(chunk):
+    """
+    중복 판별용 키: 공백을 하나로 줄이고 소문자로 바꿉니다. 숫자만 다른 청크(사양, 연혁)는 다른 청크입니다.
+    """
+    return WHITESPACE_RE.sub(" ", chunk).strip().lower()
+
+def header_key(line):
+    """
+    머리말·꼬리말 판별용 키: 숫자를 지워 페이지 번호만 다른 머리말도 같게 봅니다. 숫자뿐인 줄은 빈 문자열입니다.
+    """
+    return normalize_chunk(DIGITS_RE.sub("", line))
+
+def split_blocks(text, repeat_threshold=3, min_gap=3):
+    """
+    텍스트를 문단/글머리 항목 단위 블록으로 나눕니다.
+    여러 번 반복되는 짧은 줄(머리말·꼬리말)은 첫 번째만 남기고, 페이지 번호 줄은 버립니다.
+    머리말·꼬리말은 쪽마다 떨어져 나오므로, 같은 키의 줄이 min_gap 줄 안에 연달아 나오면
+    (숫자만 다른 사양표 행 등) 내용으로 보고 모두 남깁니다.
+    """
+    lines = [WHITESPACE_RE.sub(" ", line).strip() for line in text.splitlines()]
+    positions = {}
+    for i, line in enumerate(lines):
+        if 0 < len(line) <= 80:
+            positions.setdefault(header_key(line), []).append(i)
+    repeated = {
+        key for key, found in positions.items()
+        if key and len(found) >= repeat_threshold and min(b - a for a, b in zip(found, found[1:])) >= min_gap
+    }
+    seen_repeated = set()
+    blocks = []
+    current = []
+    last_marker = None  # 마지막으로 본 한글 글머리 기호(가, 나, 다 …)
+    for line in lines:
+        if not line or PAGE_NUMBER_RE.match(line):
+            if current:
+                blocks.append(" ".join(current))
+                current = []
+            continue
+        if len(line) <= 80:
+            key = header_key(line)
+            if key in repeated:
+                if key in seen_repeated:
+                    continue
+                seen_repeated.add(key)
+        bullet = BULLET_RE.match(line)
+        if bullet and bullet.group('hangul'):
+            # "…있습니\n다. 주요…" 처럼 단어 중간에서 줄이 바뀐 경우와 구분하기 위해, '가' 이거나 앞 항목의
+            # 다음 글자이거나 앞 줄이 문장/제목 끝(.?!。:)으로 끝났을 때만 글머리 기호로 봅니다.
+            marker = bullet.group('hangul')
+            expected = HANGUL_MARKERS[HANGUL_MARKERS.index(last_marker) + 1:][:1] if last_marker else None
+            if marker == "가" or marker == expected or not current or current[-1][-1:] in ".?!。:":
+                last_marker = marker
+            else:
+                bullet = None
+        if bullet:
+            # 글머리 항목은 새 블록으로 시작합니다.
+            if current:
+                blocks.append(" ".join(current))
+            current = [line[bullet.end():]]
+        elif current and current[-1][-1:] in ".?!。":
+            blocks.append(" ".join(current))
+            current = [line]
+        else:
+            # PDF 줄바꿈으로 끊긴 문장은 이어 붙입니다.
+            current.append(line)
+    if current:
+        blocks.append(" ".join(current))
+    return blocks
+
+def split_long(unit, max_chars):
+    """
+    max_chars 보다 긴 단위를 공백 경계에서 잘라 여러 조각으로 나눕니다.
+    """
+    pieces = []
+    while len(unit) > max_chars:
+        cut = unit.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(unit[:cut].strip())
+        unit = unit[cut:].strip()
+    if unit:
+        pieces.append(unit)
+    return pieces
+
+def chunk_text(text, min_chars=MIN_CHUNK_CHARS, max_chars=MAX_CHUNK_CHARS):
+    """
+    PDF 텍스트를 임베딩용 청크 리스트로 변환합니다.
+    1. 줄/글머리 기호 기준 블록 분리, 2. 블록 내 문장 분리, 3. 긴 문장 자르기,
+    4. 짧은 조각은 이웃 조각과 max_chars 까지 합치기, 5. 중복 청크 제거.
+    """
+    units = []
+    for block in split_blocks(text):
+        for sentence in SENTENCE_END_RE.split(block):
+            units.extend(split_long(sentence.strip(), max_chars))
+
+    # 짧은 글머리 항목/조각은 앞 청크와 합쳐 너무 작은 임베딩이 생기지 않도록 합니다.
+    merged = []
+    for unit in units:
+        if merged and (len(merged[-1]) < min_chars or len(unit) < min_chars) \
+                and len(merged[-1]) + 1 + len(unit) <= max_chars:
+            merged[-1] = f"{merged[-1]} {unit}"
+        else:
+            merged.append(unit)
+
+    chunks = []
+    seen = set()
+    for chunk in merged:
+        key = normalize_chunk(chunk)
+        if len(key) < 2 or key in seen:
+            continue
+        seen.add(key)
+        chunks.append(chunk)
+    return chunks
@@ -0,0 +1,488 @@
+"""
+구글 뉴스 RSS / 회사소개서 PDF 매칭에 쓰이는 공통 함수 모음.
+PyQt5, QtWebEngine 에 의존하지 않으므로 GUI(google_rss_312_3.py)와
+헤드리스 다이제스트(news_digest.py)가 함께 사용합니다.
+"""
+import os
+import re
+import html
+import time
+import heapq
+import hashlib
+import datetime
+import multiprocessing
+import concurrent.futures
+import numpy as np       # 수치 계산용 라이브러리
+import fitz              # PyMuPDF: PDF 파일에서 텍스트 추출용
+
+from urllib.parse import quote, urlsplit, urlunsplit, parse_qsl, urlencode
+
+from news_chunk import chunk_text
+from news_quant import quantize_pdf_data
+from pdf_watch import file_signature
+
+# 텔레그램 봇 정보 (환경변수가 있으면 우선 사용)
+TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "7763945499:AAHBg1GbFHL6GUYq5NW_2bbXo4QbpGKxtKU")
+TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "7588489578")
+
+MODEL_URL = "https://tfhub.dev/google/universal-sentence-encoder/4"
+
+# 문장 임베딩 저장 형식: float32 / float16 / int8 (news_quant.py 참고)
+EMBEDDING_STORAGE = os.environ.get("NEWS_EMBEDDING_STORAGE", "float32")
+
+# 링크 정규화 시 제거할 추적/지역 파라미터
+TRACKING_PARAMS = {"oc", "hl", "gl", "ceid", "fbclid", "gclid"}
+
+# 지역 코드 -> (hl, gl, ceid)
+REGIONS = {
+    "KR": ("ko", "KR", "KR:ko"),
+    "US": ("en", "US", "US:en"),
+    "JP": ("ja", "JP", "JP:ja"),
+    "GB": ("en-GB", "GB", "GB:en-GB"),
+    "FR": ("fr", "FR", "FR:fr"),
+}
+
+def load_embed_model(model_url=MODEL_URL):
+    """
+    TensorFlow Hub 에서 Universal Sentence Encoder 를 불러옵니다.
+    TensorFlow 는 무거우므로 실제로 모델이 필요할 때만 import 합니다.
+    """
+    import tensorflow_hub as hub  # TensorFlow Hub에서 모델 불러오기용 라이브러리
+    print("TensorFlow Hub 모델 로딩 중...")
+    embed = hub.load(model_url)
+    print("모델 로드 완료.")
+    return embed
+
+def load_pdf_text(pdf_path):
+    """
+    주어진 PDF 파일에서 텍스트를 추출하는 함수.
+    PyMuPDF(fitz)를 사용하여 PDF의 모든 페이지 텍스트를 한 번에 이어 붙입니다.
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            return "".join(page.get_text() for page in doc)
+    except Exception as e:
+        print(f"PDF 로딩 오류: {e}")
+        return ""
+
+def extract_page_range(pdf_path, start, end):
+    """
+    PDF의 [start, end) 페이지 텍스트를 리스트로 반환합니다. 프로세스 풀 작업 단위입니다.
+    """
+    with fitz.open(pdf_path) as doc:
+        return [doc[i].get_text() for i in range(start, end)]
+
+def count_pdf_pages(pdf_path):
+    """
+    PDF 페이지 수를 반환합니다. 열 수 없으면 0 을 반환합니다.
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception as e:
+        print(f"PDF 로딩 오류: {e}")
+        return 0
+
+def iter_pdf_texts(file_paths, max_workers=None, pages_per_task=8, progress_callback=None):
+    """
+    여러 PDF의 페이지를 프로세스 풀에서 병렬로 추출하여, 파일 하나가 끝날 때마다
+    (file_path, text) 를 내보내는 제너레이터입니다. 호출 측은 다음 파일이 추출되는 동안
+    앞 파일을 임베딩할 수 있습니다. 결과 순서는 완료 순서입니다.
+    페이지 수 확인도 풀에서 하며, 페이지 수가 나온 파일부터 바로 페이지 추출 작업을 넣습니다.
+    TF/Qt 스레드가 돌고 있는 프로세스를 fork 하면 자식이 멈출 수 있으므로 spawn 방식으로 띄웁니다.
+    :param progress_callback: (optional) (file_path, 완료 페이지, 파일 페이지 수, 완료 파일 수, 전체 파일 수)
+    """
+    files_total = len(file_paths)
+    files_done = 0
+    page_counts = {}  # file_path -> 페이지 수
+    chunks = {}       # file_path -> {start: [page texts]}
+    pages_done = {}   # file_path -> 추출 완료 페이지 수
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        # 값이 (file_path, None, None) 이면 페이지 수 확인 작업, 아니면 (file_path, start, end) 페이지 추출 작업
+        pending = {executor.submit(count_pdf_pages, file_path): (file_path, None, None) for file_path in file_paths}
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                file_path, start, end = pending.pop(future)
+                if start is None:
+                    try:
+                        page_count = future.result()
+                    except Exception as e:
+                        print(f"PDF 로딩 오류: {file_path} ({e})")
+                        page_count = 0
+                    page_counts[file_path] = page_count
+                    if page_count == 0:
+                        files_done += 1
+                        if progress_callback:
+                            progress_callback(file_path, 0, 0, files_done, files_total)
+                        yield file_path, ""
+                        continue
+                    chunks[file_path] = {}
+                    pages_done[file_path] = 0
+                    for page_start in range(0, page_count, pages_per_task):
+                        page_end = min(page_start + pages_per_task, page_count)
+                        task = executor.submit(extract_page_range, file_path, page_start, page_end)
+                        pending[task] = (file_path, page_start, page_end)
+                    continue
+
+                try:
+                    chunks[file_path][start] = future.result()
+                except Exception as e:
+                    print(f"PDF 로딩 오류: {file_path} {start + 1}~{end}쪽 ({e})")
+                    chunks[file_path][start] = []
+                pages_done[file_path] += end - start
+                page_count = page_counts[file_path]
+                if pages_done[file_path] == page_count:
+                    files_done += 1
+                if progress_callback:
+                    progress_callback(file_path, pages_done[file_path], page_count, files_done, files_total)
+                if pages_done[file_path] == page_count:
+                    pages = chunks.pop(file_path)
+                    yield file_path, "".join(text for start in sorted(pages) for text in pages[start])
+
+def cosine_similarity(a, b):
+    """
+    두 벡터 a와 b 사이의 코사인 유사도를 계산하는 함수.
+    """
+    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+# 회사명 패턴을 하나의 정규식으로 미리 컴파일합니다. 대안 번호(p0~p4)가 작을수록 우선합니다.
+# 전방 탐색((?=...))으로 감싸서, 낮은 순위 일치가 높은 순위 일치를 덮는 위치도 빠짐없이 훑습니다.
+COMPANY_PATTERN = re.compile("(?=(?:" + "|".join([
+    r"회사명[:：]\s*(?P<p0>[^\n,，]+)",
+    r"주식회사\s*(?P<p1>[^\n,，]+)",
+    r"유한회사\s*(?P<p2>[^\n,，]+)",
+    r"(?P<p3>[^\n,，]+)\s*주식회사",
+    r"(?P<p4>[^\n,，]+)\s*유한회사"
+]) + "))")
+SENTENCE_BOUNDARY = re.compile(r'[.?!]\s+')
+# 회사명은 앞쪽 몇 쪽에만 나온다고 보고, 앞부분 글자 수만 검색합니다.
+COMPANY_SEARCH_CHARS = 6000
+
+_company_cache = {}  # PDF 텍스트 SHA-1 -> 회사명
+
+def text_sha1(text):
+    """
+    PDF 텍스트의 SHA-1 해시(16진수)를 반환합니다.
+    """
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def extract_company_name(text, digest=None):
+    """
+    PDF 텍스트에서 회사명을 추출하는 함수.
+    '회사명:', '주식회사', '유한회사' 패턴을 합친 정규식으로 앞부분을 한 번만 훑어, 패턴 우선순위가
+    가장 높은(대안 번호가 작은) 일치를 고르고 같은 순위에서는 앞쪽 일치를 씁니다.
+    추출에 실패하면 첫 번째 문장을 반환합니다. 결과는 텍스트 해시별로 캐시합니다.
+    """
+    digest = digest or text_sha1(text)
+    if digest in _company_cache:
+        return _company_cache[digest]
+    head = text[:COMPANY_SEARCH_CHARS]
+    best = None  # (대안 번호, 위치, 회사명)
+    for match in COMPANY_PATTERN.finditer(head):
+        rank = match.lastindex - 1
+        if best is None or (rank, match.start()) < best[:2]:
+            best = (rank, match.start(), match.group(match.lastindex).strip())
+        if rank == 0:
+            break
+    if best:
+        company = best[2]
+        print("추출된 회사명:", company)
+    else:
+        boundary = SENTENCE_BOUNDARY.search(head)
+        company = (head[:boundary.start()] if boundary else head).strip()
+        print("첫 문장을 회사명으로 사용:", company)
+    _company_cache[digest] = company
+    return company
+
+def sanitize_keyword(keyword):
+    """
+    제어문자(개행 등)를 제거하고 URL 인코딩된 문자열을 반환합니다.
+    """
+    sanitized_keyword = re.sub(r'[\r\n]+', ' ', keyword).strip()
+    return quote(sanitized_keyword)
+
+def build_rss_url(keyword, hl, gl, ceid):
+    """
+    검색어와 지역 정보를 사용하여 구글 뉴스 RSS URL을 생성합니다.
+    """
+    encoded_keyword = sanitize_keyword(keyword)
+    base_url = "https://news.google.com/rss/search"
+    return f"{base_url}?q={encoded_keyword}&hl={hl}&gl={gl}&ceid={ceid}"
+
+def embed_pdf_file(file_path, embed, text=None):
+    """
+    PDF 한 개의 전체 텍스트 임베딩과 문장별 임베딩을 계산합니다.
+    text 가 주어지면 PDF를 다시 읽지 않습니다. 텍스트 추출에 실패하면 None 을 반환합니다.
+    원문 텍스트는 회사명과 해시를 구한 뒤에는 쓰이지 않으므로 결과에 남기지 않습니다('text' 는 빈 문자열).
+    """
+    if text is None:
+        text = load_pdf_text(file_path)
+    if not text:
+        print(f"{file_path}에서 텍스트 추출 실패.")
+        return None
+    digest = text_sha1(text)
+    company = extract_company_name(text, digest)
+    global_embedding = embed([text])[0]
+    sentences = chunk_text(text)
+    if sentences:
+        sentence_embeddings = embed(sentences)
+        print(f"{file_path}: 총 {len(sentences)}개의 청크 임베딩 업데이트 완료.")
+    else:
+        sentence_embeddings = None
+        print(f"{file_path}: 문장을 추출하지 못했습니다.")
+    return {
+        'file_path': file_path,
+        'text': "",
+        'text_sha1': digest,
+        'company': company,
+        'global_embedding': global_embedding,
+        'sentence_embeddings': sentence_embeddings
+    }
+
+def embed_pdf_files(file_paths, embed, max_workers=None, progress_callback=None, storage=None):
+    """
+    여러 PDF 파일의 텍스트를 병렬로 추출하면서, 추출이 끝난 파일부터 임베딩하여
+    pdf_data 리스트를 반환합니다. 결과는 file_paths 순서로 정렬됩니다.
+    문장 임베딩은 storage 형식(기본값: EMBEDDING_STORAGE)으로 바로 압축하여 텐서를 일찍 해제합니다.
+    각 항목의 'signature' 에는 읽기 시작하기 전의 파일 (수정 시각, 크기) 를 기록하여,
+    임베딩한 파일 버전과 corpus 에 기록되는 서명이 어긋나지 않게 합니다.
+    :param progress_callback: (optional) iter_pdf_texts 와 같은 형식의 진행률 콜백
+    """
+    storage = storage or EMBEDDING_STORAGE
+    order = {file_path: i for i, file_path in enumerate(file_paths)}
+    signatures = {file_path: file_signature(file_path) for file_path in file_paths}
+    pdf_data = []
+    for file_path, text in iter_pdf_texts(file_paths, max_workers, progress_callback=progress_callback):
+        pdf = embed_pdf_file(file_path, embed, text)
+        if pdf is not None:
+            pdf['signature'] = signatures[file_path]
+            pdf_data.extend(quantize_pdf_data([pdf], storage))
+    pdf_data.sort(key=lambda pdf: order[pdf['file_path']])
+    return pdf_data
+
+def merge_pdf_data(pdf_data, updated=(), removed=()):
+    """
+    기존 pdf_data 에서 removed 경로를 빼고 updated 항목을 추가/교체한 새 리스트를 반환합니다.
+    나머지 항목은 다시 임베딩하지 않고 그대로 재사용하며, 결과는 파일 경로 순으로 정렬됩니다.
+    """
+    by_path = {pdf['file_path']: pdf for pdf in pdf_data}
+    for file_path in removed:
+        by_path.pop(file_path, None)
+    for pdf in updated:
+        by_path[pdf['file_path']] = pdf
+    return [by_path[file_path] for file_path in sorted(by_path)]
+
+def to_numpy(tensor):
+    """
+    TensorFlow 텐서이면 numpy 배열로 변환하고, 그 외에는 그대로 반환합니다.
+    """
+    return tensor.numpy() if hasattr(tensor, "numpy") else np.asarray(tensor)
+
+def sentence_similarities(sentence_embeddings, news_emb_np):
+    """
+    문장 임베딩 행렬과 뉴스 임베딩의 코사인 유사도 배열을 반환합니다.
+    압축 저장된 임베딩(news_quant.QuantizedEmbeddings)은 압축된 상태로 계산합니다.
+    """
+    if hasattr(sentence_embeddings, "similarities"):
+        return sentence_embeddings.similarities(news_emb_np)
+    sentence_emb_np = to_numpy(sentence_embeddings)
+    norms = np.linalg.norm(sentence_emb_np, axis=1)
+    news_norm = np.linalg.norm(news_emb_np)
+    return np.dot(sentence_emb_np, news_emb_np) / (norms * news_norm)
+
+def compute_composite_similarity(news_embedding, pdf_data, threshold=0.15):
+    """
+    뉴스 제목 임베딩과 각 PDF의 임베딩 간의 복합 코사인 유사도를 계산합니다.
+    1. 글로벌 유사도, 2. 최고 문장 유사도, 3. 유효 문장 평균 유사도를 가중 평균하여 최종 점수를 산출합니다.
+    :return: (최고 복합 유사도, 최고 기여 PDF 경로)
+    """
+    news_emb_np = to_numpy(news_embedding)
+    best_composite = -1.0
+    best_pdf = "N/A"
+    for pdf in pdf_data:
+        global_emb_np = to_numpy(pdf['global_embedding'])
+        global_sim = cosine_similarity(global_emb_np, news_emb_np)
+        composite_sim = global_sim
+        if pdf['sentence_embeddings'] is not None:
+            sentence_sims = sentence_similarities(pdf['sentence_embeddings'], news_emb_np)
+            top_sentence_sim = np.max(sentence_sims)
+            valid_sentences = sentence_sims[sentence_sims > threshold]
+            avg_valid_sim = np.mean(valid_sentences) if valid_sentences.size > 0 else 0
+            composite_sim = 0.3 * global_sim + 0.4 * top_sentence_sim + 0.3 * avg_valid_sim
+        if composite_sim > best_composite:
+            best_composite = composite_sim
+            best_pdf = pdf['file_path']
+    return float(best_composite), best_pdf
+
+def compute_composite_similarity_batch(news_embeddings, pdf_data, threshold=0.15):
+    """
+    compute_composite_similarity 의 행렬 버전. 뉴스 N건을 PDF마다 한 번의 행렬 곱으로 채점합니다.
+    :return: (N,) 최고 복합 유사도 배열, 길이 N 의 최고 기여 PDF 경로 리스트
+    """
+    news = np.asarray(to_numpy(news_embeddings), dtype=np.float32)
+    news_norms = np.linalg.norm(news, axis=1)
+    news_norms[news_norms == 0] = 1.0
+    news_unit = news / news_norms[:, None]
+    best_scores = np.full(len(news), -1.0)
+    best_index = np.full(len(news), -1)
+    for i, pdf in enumerate(pdf_data):
+        global_emb_np = np.asarray(to_numpy(pdf['global_embedding']), dtype=np.float32)
+        global_sims = news_unit @ global_emb_np / np.linalg.norm(global_emb_np)
+        composite = global_sims
+        if pdf['sentence_embeddings'] is not None:
+            sims = sentence_similarity_matrix(pdf['sentence_embeddings'], news_unit)
+            top_sentence = sims.max(axis=1)
+            valid = sims > threshold
+            counts = valid.sum(axis=1)
+            sums = np.where(valid, sims, 0).sum(axis=1)
+            avg_valid = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+            composite = 0.3 * global_sims + 0.4 * top_sentence + 0.3 * avg_valid
+        better = composite > best_scores
+        best_scores[better] = composite[better]
+        best_index[better] = i
+    best_pdfs = [pdf_data[i]['file_path'] if i >= 0 else "N/A" for i in best_index]
+    return best_scores, best_pdfs
+
+def sentence_similarity_matrix(sentence_embeddings, news_unit):
+    """
+    (N, D) 단위 뉴스 벡터와 (S, D) 문장 임베딩의 코사인 유사도 (N, S) 행렬을 반환합니다.
+    """
+    if hasattr(sentence_embeddings, "similarity_matrix"):
+        return sentence_embeddings.similarity_matrix(news_unit)
+    sentence_emb_np = np.asarray(to_numpy(sentence_embeddings), dtype=np.float32)
+    norms = np.linalg.norm(sentence_emb_np, axis=1)
+    norms[norms == 0] = 1.0
+    return (news_unit @ sentence_emb_np.T) / norms
+
+def normalize_link(link):
+    """
+    스킴/호스트를 소문자로 바꾸고 프래그먼트와 추적·지역 파라미터를 제거한 링크를 반환합니다.
+    """
+    parts = urlsplit(link.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in TRACKING_PARAMS and not k.startswith("utm_")]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+def entry_to_article(entry):
+    """
+    feedparser 엔트리를 기사 딕셔너리로 변환합니다.
+    """
+    return {
+        'title': entry.title,
+        'link': entry.link,
+        'guid': entry.get('id', ''),
+        'published': entry.get('published', '발행 일자 없음'),
+        'summary': entry.get('summary', ''),
+        'published_parsed': entry.get('published_parsed', None)
+    }
+
+def digest_window(today=None):
+    """
+    텔레그램 다이제스트 기간(전날 21시 ~ 오늘 오전 9시)을 반환합니다.
+    """
+    today_date = today or datetime.date.today()
+    lower_bound = datetime.datetime.combine(today_date - datetime.timedelta(days=1), datetime.time(21, 0, 0))
+    upper_bound = datetime.datetime.combine(today_date, datetime.time(9, 0, 0))
+    return lower_bound, upper_bound
+
+def filter_digest_window(articles, today=None):
+    """
+    발행 시간이 다이제스트 기간 안에 있는 기사만 골라냅니다.
+    """
+    lower_bound, upper_bound = digest_window(today)
+    filtered_articles = []
+    for article in articles:
+        pub_parsed = article.get('published_parsed')
+        if pub_parsed:
+            pub_date = datetime.datetime.fromtimestamp(time.mktime(pub_parsed))
+            if lower_bound <= pub_date <= upper_bound:
+                filtered_articles.append(article)
+    return filtered_articles
+
+class TopArticles:
+    """
+    채점되는 기사를 하나씩 받아 유사도 상위 k개만 유지하는 스트리밍 누적기.
+    크기 k 의 최소 힙을 사용하므로 n건 처리에 O(n log k), 메모리는 O(k) 입니다.
+    per_pdf_k 를 주면 최고 기여 PDF(best_pdf)별 상위 기사도 따로 유지합니다.
+    """
+
+    def __init__(self, k=3, per_pdf_k=0):
+        self.k = k
+        self.per_pdf_k = per_pdf_k
+        self.heap = []
+        self.pdf_heaps = {}
+        self.count = 0  # 같은 유사도일 때 먼저 들어온 기사를 우선하기 위한 순번
+
+    @staticmethod
+    def _push(heap, k, item):
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def push(self, article):
+        """
+        기사 하나를 반영합니다. article['similarity'] 가 있어야 합니다.
+        """
+        self.count += 1
+        item = (article['similarity'], -self.count, article)
+        if self.k > 0:
+            self._push(self.heap, self.k, item)
+        if self.per_pdf_k > 0:
+            heap = self.pdf_heaps.setdefault(article.get('best_pdf', "N/A"), [])
+            self._push(heap, self.per_pdf_k, item)
+
+    def extend(self, articles):
+        for article in articles:
+            self.push(article)
+
+    def top(self):
+        """
+        전체 상위 기사를 유사도 내림차순으로 반환합니다.
+        """
+        return [article for _, _, article in sorted(self.heap, reverse=True)]
+
+    def top_by_pdf(self):
+        """
+        {best_pdf: 상위 기사 리스트} 를 PDF별 최고 유사도 내림차순으로 반환합니다.
+        """
+        groups = {pdf: [article for _, _, article in sorted(heap, reverse=True)]
+                  for pdf, heap in self.pdf_heaps.items()}
+        return dict(sorted(groups.items(), key=lambda kv: kv[1][0]['similarity'], reverse=True))
+
+def format_digest_message(articles, header="<b>Filtered News Articles (전날 21시 ~ 오늘 오전 9시):</b>"):
+    """
+    기사 리스트를 텔레그램 HTML 메시지 문자열로 만듭니다.
+    """
+    message_lines = [header]
+    for idx, article in enumerate(articles, start=1):
+        message_lines.append(format_article_line(idx, article))
+    return "\n\n".join(message_lines)
+
+def format_article_line(idx, article):
+    """
+    다이제스트 메시지의 기사 한 줄(제목, 유사도, 링크)을 만듭니다.
+    HTML 모드로 보내므로 제목과 링크의 <, >, & 는 이스케이프합니다("<속보>" 같은 제목은 그대로 보내면 400 오류).
+    """
+    line = f"{idx}. {html.escape(article['title'], quote=False)}"
+    if 'similarity' in article:
+        line += f" (sim={article['similarity']:.2f})"
+    return line + f"\nLink: {html.escape(article.get('canonical_link') or article['link'], quote=False)}"
+
+def format_grouped_digest_message(groups, companies=None,
+                                  header="<b>Filtered News Articles (전날 21시 ~ 오늘 오전 9시):</b>"):
+    """
+    {PDF 경로: 기사 리스트} 를 회사(PDF)별 섹션으로 나눈 텔레그램 HTML 메시지로 만듭니다.
+    :param companies: (optional) {PDF 경로: 회사명}. 없으면 파일 이름을 제목으로 씁니다.
+    """
+    companies = companies or {}
+    message_lines = [header]
+    for pdf, articles in groups.items():
+        title = html.escape(companies.get(pdf) or os.path.basename(pdf), quote=False)
+        message_lines.append(f"<b>[{title}]</b>")
+        for idx, article in enumerate(articles, start=1):
+            message_lines.append(format_article_line(idx, article))
+    return "\n\n".join(message_lines)
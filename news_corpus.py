@@ -0,0 +1,218 @@
+"""
+회사소개서 임베딩 corpus 를 여러 프로세스가 함께 쓰는 메모리 맵 파일로 저장하는 모듈.
+
+corpus/ 폴더 구성:
+    corpus.json            현재 세대 이름과 PDF별 메타데이터(회사명, 행 범위, 파일 크기/수정 시각)
+    <세대>/sentences.npy    모든 PDF의 문장 임베딩을 이어 붙인 (S, D) 행렬 (저장 형식 그대로)
+    <세대>/row_factor.npy   행별 코사인 계수, int8 이면 <세대>/scale.npy 도 함께 저장
+    <세대>/globals.npy      PDF별 전체 텍스트 임베딩 (M, D) float32
+    .lock                  쓰기 잠금 파일 (fcntl.flock)
+
+쓰는 쪽은 잠금을 잡고 새 세대 폴더를 모두 쓴 뒤 corpus.json 을 os.replace 로 교체하므로,
+읽는 쪽은 항상 완성된 세대만 봅니다. 읽는 쪽은 잠금 없이 np.load(mmap_mode='r') 로 매핑하여
+같은 파일을 보는 모든 프로세스가 페이지 캐시를 공유합니다.
+저장 형식(float32 / float16 / int8)은 폴더마다 처음 쓴 형식으로 고정되며, 다른 형식으로 쓰면 ValueError 가 납니다.
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import contextlib
+
+import numpy as np       # 수치 계산용 라이브러리
+
+from news_core import EMBEDDING_STORAGE, embed_pdf_files, merge_pdf_data
+from news_quant import QuantizedEmbeddings
+from pdf_watch import scan_folder, diff_snapshots
+
+CORPUS_DIR = os.environ.get("NEWS_CORPUS_DIR", "corpus")
+CORPUS_VERSION = 1
+LOCK_NAME = ".lock"
+
+def _save_array(path, array):
+    with open(path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+        f.flush()
+        os.fsync(f.fileno())
+
+@contextlib.contextmanager
+def corpus_lock(directory=CORPUS_DIR):
+    """
+    corpus 폴더의 쓰기 잠금. GUI 와 다이제스트가 같은 폴더에 쓸 때 세대 쓰기부터 정리까지를 한 번에 하나씩 처리합니다.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def check_corpus_mode(meta, storage, directory=CORPUS_DIR):
+    """
+    저장된 corpus 와 저장 형식이 다르면 ValueError 를 냅니다.
+    형식이 다른 두 프로세스가 서로의 corpus 를 번갈아 덮어쓰며 전체를 다시 임베딩하지 않도록 합니다.
+    """
+    if meta is not None and meta['mode'] != storage:
+        raise ValueError(f"{directory} 의 저장 형식은 {meta['mode']} 인데 {storage} 로 쓰려고 합니다. "
+                         f"같은 저장 형식(NEWS_EMBEDDING_STORAGE / --storage)을 쓰거나 다른 corpus 폴더를 지정하세요.")
+
+def write_corpus(pdf_data, directory=CORPUS_DIR, storage=None):
+    """
+    pdf_data 를 새 세대로 저장하고 corpus.json 을 원자적으로 교체합니다.
+    문장 임베딩은 QuantizedEmbeddings 형태여야 하며(embed_pdf_files 결과), 모두 같은 저장 형식이어야 합니다.
+    PDF별로 임베딩할 때 기록한 파일 서명(pdf['signature'])을 함께 저장하여, 다음 실행 때 바뀐 파일만 다시 임베딩합니다.
+    :param storage: (optional) 문장 임베딩이 하나도 없을 때 기록할 저장 형식. 생략하면 기존 corpus 의 형식을 따릅니다.
+    """
+    with corpus_lock(directory):
+        return _write_corpus_locked(pdf_data, directory, storage)
+
+def _write_corpus_locked(pdf_data, directory, storage):
+    started = time.time()
+    previous = read_corpus_meta(directory)
+    sentence_parts = [pdf['sentence_embeddings'] for pdf in pdf_data if pdf['sentence_embeddings'] is not None]
+    modes = {part.mode for part in sentence_parts}
+    if len(modes) > 1:
+        raise ValueError(f"저장 형식이 섞여 있습니다: {sorted(modes)}")
+    mode = modes.pop() if modes else storage or (previous['mode'] if previous else EMBEDDING_STORAGE)
+    check_corpus_mode(previous, mode, directory)
+    dim = len(pdf_data[0]['global_embedding']) if pdf_data else 0
+    rows = sum(len(part) for part in sentence_parts)
+
+    generation = uuid.uuid4().hex[:12]
+    generation_dir = os.path.join(directory, generation)
+    os.makedirs(generation_dir)
+    # 기존 corpus 를 매핑한 채로 새 세대를 쓰므로, 전체를 메모리에 모으지 않고 파일에 바로 씁니다.
+    sentences = np.lib.format.open_memmap(os.path.join(generation_dir, "sentences.npy"), mode="w+",
+                                          dtype=np.dtype(mode), shape=(rows, dim))
+    row_factor = np.empty(rows, dtype=np.float32)
+    scale = np.empty(rows, dtype=np.float32) if mode == "int8" else None
+    entries = []
+    offset = 0
+    for pdf in pdf_data:
+        part = pdf['sentence_embeddings']
+        count = len(part) if part is not None else 0
+        if count:
+            sentences[offset:offset + count] = part.data
+            row_factor[offset:offset + count] = part.row_factor
+            if scale is not None:
+                scale[offset:offset + count] = part.scale
+        signature = pdf.get('signature')
+        entries.append({
+            'file_path': pdf['file_path'],
+            'text_sha1': pdf.get('text_sha1'),
+            'company': pdf.get('company'),
+            'start': offset,
+            'stop': offset + count,
+            'has_sentences': part is not None,
+            'signature': list(signature) if signature else None
+        })
+        offset += count
+    sentences.flush()
+    del sentences
+    _save_array(os.path.join(generation_dir, "row_factor.npy"), row_factor)
+    if scale is not None:
+        _save_array(os.path.join(generation_dir, "scale.npy"), scale)
+    globals_matrix = np.array([np.asarray(pdf['global_embedding'], dtype=np.float32) for pdf in pdf_data],
+                              dtype=np.float32).reshape(len(pdf_data), dim)
+    _save_array(os.path.join(generation_dir, "globals.npy"), globals_matrix)
+
+    meta_path = os.path.join(directory, "corpus.json")
+    tmp_path = f"{meta_path}.{generation}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({'version': CORPUS_VERSION, 'generation': generation, 'mode': mode, 'dim': dim,
+                   'pdfs': entries}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, meta_path)
+    print(f"corpus 저장 완료: {directory}/{generation} (PDF {len(entries)}개, 문장 {rows}개, {mode})")
+
+    # 직전 세대는 아직 읽는 중인 프로세스가 있을 수 있어 남기고, 이번 쓰기보다 먼저 만들어진 세대만 지웁니다.
+    # 쓰기는 잠금으로 한 번에 하나씩만 이루어지므로, 그런 세대는 다 쓴 옛 세대이거나 중단된 쓰기의 잔재입니다.
+    keep = {generation, previous['generation'] if previous else None}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path) and name not in keep and os.stat(path).st_mtime < started:
+            shutil.rmtree(path, ignore_errors=True)
+    return generation
+
+def read_corpus_meta(directory=CORPUS_DIR):
+    """
+    corpus.json 을 읽어 반환합니다. 없거나 형식이 맞지 않으면 None 을 반환합니다.
+    """
+    try:
+        with open(os.path.join(directory, "corpus.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == CORPUS_VERSION else None
+
+def open_corpus(directory=CORPUS_DIR):
+    """
+    현재 세대를 읽기 전용 메모리 맵으로 열어 (메타데이터, pdf_data) 를 반환합니다. 없으면 (None, []).
+    PDF별 문장 임베딩은 공유 행렬의 슬라이스(뷰)라서 프로세스마다 복사본이 생기지 않습니다.
+    """
+    meta = read_corpus_meta(directory)
+    if meta is None:
+        return None, []
+    generation_dir = os.path.join(directory, meta['generation'])
+    try:
+        sentences = np.load(os.path.join(generation_dir, "sentences.npy"), mmap_mode="r")
+        row_factor = np.load(os.path.join(generation_dir, "row_factor.npy"), mmap_mode="r")
+        scale = np.load(os.path.join(generation_dir, "scale.npy"), mmap_mode="r") if meta['mode'] == "int8" else None
+        globals_matrix = np.load(os.path.join(generation_dir, "globals.npy"), mmap_mode="r")
+    except (OSError, ValueError) as e:
+        # 메타데이터를 읽은 직후 다른 프로세스가 세대를 바꾸고 지운 경우 등
+        print(f"corpus 로딩 오류: {e}")
+        return None, []
+    pdf_data = []
+    for i, entry in enumerate(meta['pdfs']):
+        start, stop = entry['start'], entry['stop']
+        sentence_embeddings = None
+        if entry['has_sentences']:
+            sentence_embeddings = QuantizedEmbeddings.from_parts(
+                sentences[start:stop], row_factor[start:stop],
+                scale[start:stop] if scale is not None else None, meta['mode']
+            )
+        pdf_data.append({
+            'file_path': entry['file_path'],
+            'text': "",
+            'text_sha1': entry['text_sha1'],
+            'company': entry['company'],
+            'signature': tuple(entry['signature']) if entry['signature'] else None,
+            'global_embedding': globals_matrix[i],
+            'sentence_embeddings': sentence_embeddings
+        })
+    print(f"corpus 매핑 완료: {directory}/{meta['generation']} (PDF {len(pdf_data)}개)")
+    return meta, pdf_data
+
+def corpus_changes(meta, pdf_data, folder, storage, directory=CORPUS_DIR):
+    """
+    저장된 corpus 와 폴더의 현재 상태를 비교하여 (재사용할 pdf_data, 다시 임베딩할 경로, 스냅샷) 을 반환합니다.
+    저장 형식이 다르면 ValueError 를 냅니다(check_corpus_mode).
+    """
+    check_corpus_mode(meta, storage, directory)
+    snapshot = scan_folder(folder)
+    if meta is None:
+        return [], sorted(snapshot), snapshot
+    known = {entry['file_path']: tuple(entry['signature']) for entry in meta['pdfs'] if entry['signature']}
+    changed, _ = diff_snapshots(known, snapshot)
+    changed_set = set(changed)
+    reusable = [pdf for pdf in pdf_data if pdf['file_path'] in snapshot and pdf['file_path'] not in changed_set]
+    return reusable, changed, snapshot
+
+def sync_corpus(folder, embed, storage=None, directory=CORPUS_DIR, progress_callback=None):
+    """
+    저장된 corpus 를 매핑하고 폴더에서 추가/변경된 PDF만 임베딩한 뒤, 바뀐 것이 있으면 새 세대를 씁니다.
+    :return: (pdf_data, 스냅샷)
+    """
+    storage = storage or EMBEDDING_STORAGE
+    meta, cached = open_corpus(directory)
+    reusable, changed, snapshot = corpus_changes(meta, cached, folder, storage, directory)
+    updated = embed_pdf_files(changed, embed, progress_callback=progress_callback, storage=storage) if changed else []
+    pdf_data = merge_pdf_data(reusable, updated)
+    if changed or len(reusable) != len(cached) or (meta is None and pdf_data):
+        write_corpus(pdf_data, directory, storage)
+    return pdf_data, snapshot
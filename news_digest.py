@@ -0,0 +1,195 @@
+"""
+헤드리스 뉴스 다이제스트 서비스.
+PyQt5/QtWebEngine 없이 data/ 폴더의 회사소개서 PDF를 임베딩해 두고,
+정해진 시각마다 구글 뉴스 RSS를 조회하여 전날 21시 ~ 오늘 오전 9시 사이의
+관련 기사 상위 N개를 텔레그램으로 전송합니다.
+실행 중에 data/ 폴더에 추가/변경/삭제된 PDF는 해당 파일만 다시 임베딩하여 반영합니다.
+PDF 임베딩은 corpus/ 메모리 맵 파일로 저장되어, 다음 실행과 다른 프로세스가 다시 계산하지 않고 공유합니다.
+
+사용 예:
+    python news_digest.py --keyword 인터오션 --region KR --at 09:00
+    python news_digest.py --once
+"""
+import sys
+import time
+import argparse
+import datetime
+import threading
+
+from news_core import (
+    REGIONS, TopArticles, embed_pdf_files, filter_digest_window,
+    format_digest_message, format_grouped_digest_message, merge_pdf_data
+)
+from embed_server import load_shared_embedder
+from news_fetch import FeedFetcher, LinkResolver, resolve_articles
+from news_quant import STORAGE_MODES
+from news_store import SeenArticleStore, corpus_signature, score_articles_cached
+from news_corpus import CORPUS_DIR, sync_corpus, write_corpus
+from pdf_watch import PDFFolderWatcher
+from telegram_queue import TelegramOutbox
+
+def parse_times(values):
+    """
+    'HH:MM' 문자열 리스트를 datetime.time 리스트로 변환합니다.
+    """
+    times = []
+    for value in values:
+        hour, minute = value.split(":")
+        times.append(datetime.time(int(hour), int(minute)))
+    return sorted(times)
+
+def next_run_at(times, now=None):
+    """
+    현재 시각 이후 가장 가까운 실행 시각(datetime)을 반환합니다.
+    """
+    now = now or datetime.datetime.now()
+    for t in times:
+        candidate = datetime.datetime.combine(now.date(), t)
+        if candidate > now:
+            return candidate
+    return datetime.datetime.combine(now.date() + datetime.timedelta(days=1), times[0])
+
+class NewsDigestService:
+    """
+    모델과 PDF 임베딩을 한 번만 로드한 뒤 다이제스트를 반복 생성하는 서비스.
+    """
+
+    def __init__(self, keywords, regions, data_folder="data", top_n=3, similarity_threshold=0.2,
+                 store_path="seen_articles.db", storage=None, per_pdf=0, corpus_dir=CORPUS_DIR):
+        self.keywords = keywords
+        self.regions = regions
+        self.data_folder = data_folder
+        self.top_n = top_n
+        self.similarity_threshold = similarity_threshold
+        self.storage = storage
+        self.per_pdf = per_pdf
+        self.corpus_dir = corpus_dir
+        self.fetcher = FeedFetcher()
+        self.resolver = LinkResolver()
+        self.store = SeenArticleStore(store_path)
+        self.outbox = TelegramOutbox()
+        self.embed = load_shared_embedder()
+        self.pdf_lock = threading.Lock()
+        self.pdf_data, snapshot = self.load_pdf_data()
+        self.corpus = corpus_signature(self.pdf_data)
+        # 임베딩 전에 찍은 스냅샷 이후의 변경만 다시 처리합니다.
+        self.watcher = PDFFolderWatcher(self.data_folder, self.on_pdf_changed, snapshot=snapshot)
+
+    def load_pdf_data(self):
+        """
+        corpus/ 에 저장된 임베딩을 매핑하고, data/ 폴더에서 새로 추가되거나 바뀐 PDF만 임베딩합니다.
+        :return: (pdf_data, 폴더 스냅샷)
+        """
+        pdf_data, snapshot = sync_corpus(self.data_folder, self.embed, self.storage, self.corpus_dir)
+        if not pdf_data:
+            print(f"{self.data_folder} 폴더에 PDF 파일이 없습니다.")
+        return pdf_data, snapshot
+
+    def on_pdf_changed(self, changed, removed):
+        """
+        PDFFolderWatcher 콜백. 추가/변경된 PDF만 임베딩하여 pdf_data 를 교체합니다.
+        진행 중인 다이제스트는 이전 리스트를 그대로 사용합니다.
+        """
+        updated = embed_pdf_files(changed, self.embed, storage=self.storage) if changed else []
+        with self.pdf_lock:
+            self.pdf_data = merge_pdf_data(self.pdf_data, updated, removed)
+            self.corpus = corpus_signature(self.pdf_data)
+            write_corpus(self.pdf_data, self.corpus_dir)
+        print(f"PDF 임베딩 갱신 완료: {len(self.pdf_data)}개 파일")
+
+    def resolve_keywords(self, pdf_data):
+        """
+        지정된 검색어가 없으면 첫 번째 PDF에서 회사명을 추출하여 사용합니다.
+        """
+        if self.keywords:
+            return self.keywords
+        if pdf_data:
+            return [pdf_data[0]['company']]
+        return []
+
+    def select_articles(self, articles, pdf_data, corpus):
+        """
+        새 기사 제목만 임베딩하고 PDF와의 복합 유사도를 계산하면서, 임계값을 넘는 기사를
+        상위 k 누적기에 바로 반영합니다. PDF가 없으면 유사도 없이 피드 순서대로 top_n 건을 고릅니다.
+        :return: (전체 상위 기사, {PDF: 상위 기사})
+        """
+        if not pdf_data or not articles:
+            return articles[:self.top_n], {}
+        top = TopArticles(self.top_n, self.per_pdf)
+        for article in score_articles_cached(self.store, articles, self.embed, pdf_data, corpus):
+            print(f"뉴스: {article['title']} / 복합 유사도: {article['similarity']:.2f} / Best PDF: {article['best_pdf']}")
+            if article['similarity'] >= self.similarity_threshold:
+                top.push(article)
+        return top.top(), top.top_by_pdf()
+
+    def run_once(self):
+        """
+        RSS를 조회하고 다이제스트 기간의 관련 기사를 텔레그램으로 전송합니다.
+        per_pdf 가 설정되어 있으면 회사(PDF)별 상위 기사를 섹션으로 나눠 보냅니다.
+        """
+        regions = [REGIONS[region] for region in self.regions]
+        with self.pdf_lock:
+            pdf_data, corpus = self.pdf_data, self.corpus
+        articles = self.fetcher.fetch_all(self.resolve_keywords(pdf_data), regions)
+        # 언론사 URL 해석은 기사마다 요청이 필요하므로 다이제스트 기간의 기사만 해석하고, 그 URL 기준으로 중복을 제거합니다.
+        window_articles = resolve_articles(filter_digest_window(articles), self.resolver)
+        filtered_articles = self.store.filter_unsent(window_articles)
+        top_articles, pdf_groups = self.select_articles(filtered_articles, pdf_data, corpus)
+        if self.per_pdf and pdf_groups:
+            companies = {pdf['file_path']: pdf['company'] for pdf in pdf_data}
+            message = format_grouped_digest_message(pdf_groups, companies)
+            top_articles = [article for group in pdf_groups.values() for article in group]
+        elif top_articles:
+            message = format_digest_message(top_articles)
+        else:
+            print("[%s] 텔레그램으로 전송할 조건에 맞는 뉴스 기사가 없습니다." % datetime.datetime.now())
+            return []
+        self.outbox.enqueue(message)
+        self.store.mark_sent(top_articles)
+        return top_articles
+
+    def serve_forever(self, times):
+        """
+        지정된 시각마다 run_once 를 실행합니다. 오류가 나도 다음 실행은 계속됩니다.
+        기다리는 동안 data/ 폴더를 감시하여 PDF 변경을 반영합니다.
+        """
+        self.watcher.start()
+        while True:
+            run_at = next_run_at(times)
+            print("[%s] 다음 다이제스트 예정: %s" % (datetime.datetime.now(), run_at))
+            time.sleep(max(0.0, (run_at - datetime.datetime.now()).total_seconds()))
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"다이제스트 생성 오류: {e}")
+
+def main():
+    """
+    명령행 인자를 해석하여 헤드리스 다이제스트를 실행합니다.
+    """
+    parser = argparse.ArgumentParser(description="헤드리스 구글 뉴스 텔레그램 다이제스트")
+    parser.add_argument("--keyword", action="append", default=[], help="검색어 (여러 번 지정 가능, 생략 시 PDF에서 추출)")
+    parser.add_argument("--region", action="append", choices=sorted(REGIONS), help="지역 코드 (기본값: KR)")
+    parser.add_argument("--data", default="data", help="회사소개서 PDF 폴더")
+    parser.add_argument("--at", action="append", help="전송 시각 HH:MM (여러 번 지정 가능, 기본값: 09:00)")
+    parser.add_argument("--top", type=int, default=3, help="전송할 기사 수")
+    parser.add_argument("--per-pdf", type=int, default=0, help="회사(PDF)별로 보낼 상위 기사 수 (0이면 전체 상위만)")
+    parser.add_argument("--store", default="seen_articles.db", help="이미 본 기사 저장소 경로")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="공유 임베딩 corpus 폴더")
+    parser.add_argument("--storage", choices=STORAGE_MODES, help="문장 임베딩 저장 형식 (기본값: NEWS_EMBEDDING_STORAGE 또는 float32)")
+    parser.add_argument("--once", action="store_true", help="한 번만 실행하고 종료")
+    args = parser.parse_args()
+
+    service = NewsDigestService(args.keyword, args.region or ["KR"], args.data, args.top,
+                                store_path=args.store, storage=args.storage,
+                                per_pdf=args.per_pdf, corpus_dir=args.corpus)
+    if args.once:
+        service.run_once()
+        # 대기열은 디스크에 남으므로, 시간 안에 못 보낸 메시지는 다음 실행 때 전송됩니다.
+        service.outbox.flush(timeout=120)
+        return 0
+    service.serve_forever(parse_times(args.at or ["09:00"]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+여러 (검색어, 지역) 구글 뉴스 RSS 피드를 동시에 가져오는 모듈.
+ETag / Last-Modified 조건부 GET 으로 변경되지 않은 피드는 다시 내려받지 않고,
+지역 간 중복 기사는 guid / 정규화된 링크 기준으로 제거합니다.
+구글 뉴스 리다이렉트 링크는 LinkResolver 로 일괄 해석하여 언론사 URL(canonical_link)로 바꿉니다.
+해석은 기사마다 네트워크 요청이 필요하므로 수집과 분리하여(resolve_articles), 기간 필터 등으로
+실제로 쓸 기사만 남긴 뒤에 호출합니다.
+"""
+import re
+import time
+import sqlite3
+import threading
+import concurrent.futures
+
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+import feedparser        # RSS 피드 파싱용 라이브러리
+
+from news_core import build_rss_url, entry_to_article, normalize_link
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+# 구글 뉴스 중간 페이지에 들어 있는 언론사 URL
+GOOGLE_NEWS_TARGET_RE = re.compile(rb'data-n-au="([^"]+)"')
+
+def is_google_url(url):
+    """
+    google.com 또는 그 하위 도메인(news.google.com, consent.google.com 등)의 URL 이면 True.
+    """
+    host = (urlsplit(url).hostname or "").lower()
+    return host == "google.com" or host.endswith(".google.com")
+
+def resolve_final_url(session, url, timeout=10):
+    """
+    리다이렉트를 따라가 최종 URL을 반환합니다. 요청이 실패하면 None 을 반환합니다.
+    HTTP 리다이렉트 없이 news.google.com 중간 페이지에 머물면 앞부분(64KB)만 읽어 언론사 URL을 찾습니다.
+    언론사 URL을 찾지 못해 구글 페이지(중간 페이지, 동의/봇 확인 페이지 등)에 머물면 None 을 반환하여
+    캐시하지 않고 다음에 다시 시도합니다.
+    """
+    try:
+        with session.get(url, allow_redirects=True, timeout=timeout, stream=True,
+                         headers={"User-Agent": USER_AGENT}) as response:
+            final_url = response.url
+            if is_google_url(final_url):
+                head = next(response.iter_content(65536), b"")
+                match = GOOGLE_NEWS_TARGET_RE.search(head)
+                if match:
+                    final_url = match.group(1).decode("utf-8").replace("&amp;", "&")
+            if is_google_url(final_url):
+                print(f"언론사 URL을 찾지 못함: {url} -> {final_url}")
+                return None
+            return final_url
+    except requests.RequestException as e:
+        print(f"리다이렉트 확인 실패: {url} ({e})")
+        return None
+
+class LinkResolver:
+    """
+    링크 -> 최종(언론사) URL 을 여러 개 동시에 해석하고 SQLite 에 영구 캐시합니다.
+    한 번 해석한 링크는 다시 요청하지 않습니다. 요청이 실패한 링크는 캐시하지 않고 원래 링크를 그대로 씁니다.
+    """
+
+    def __init__(self, path="resolved_links.db", max_workers=8, timeout=10):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS links (link TEXT PRIMARY KEY, url TEXT, resolved_at REAL)")
+        self.conn.commit()
+
+    def _lookup(self, links):
+        found = {}
+        with self.lock:
+            for start in range(0, len(links), 500):
+                chunk = links[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self.conn.execute(
+                    f"SELECT link, url FROM links WHERE link IN ({placeholders})", chunk
+                ))
+        # 이전 버전이 구글 페이지를 해석 결과로 캐시해 두었으면 다시 해석합니다.
+        return {link: url for link, url in found.items() if not is_google_url(url)}
+
+    def resolve_many(self, links):
+        """
+        {링크: 최종 URL} 을 반환합니다. 캐시에 없는 링크만 스레드 풀에서 동시에 해석합니다.
+        """
+        links = list(dict.fromkeys(links))
+        resolved = self._lookup(links)
+        missing = [link for link in links if link not in resolved]
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = executor.map(lambda link: resolve_final_url(self.session, link, self.timeout), missing)
+                fresh = dict(zip(missing, results))
+            now = time.time()
+            with self.lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO links (link, url, resolved_at) VALUES (?, ?, ?)",
+                    [(link, url, now) for link, url in fresh.items() if url]
+                )
+                self.conn.commit()
+            resolved.update((link, url or link) for link, url in fresh.items())
+            print(f"링크 {len(links)}개 중 새로 해석한 링크 {len(missing)}개")
+        return resolved
+
+    def resolve(self, link):
+        return self.resolve_many([link])[link]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def article_keys(article):
+    """
+    중복 판별에 사용할 키(guid, 정규화된 링크, 정규화된 언론사 URL)를 반환합니다.
+    """
+    keys = []
+    if article.get('guid'):
+        keys.append(("guid", article['guid']))
+    if article.get('link'):
+        keys.append(("link", normalize_link(article['link'])))
+    if article.get('canonical_link'):
+        keys.append(("link", normalize_link(article['canonical_link'])))
+    return keys
+
+def resolve_articles(articles, resolver, selected=None):
+    """
+    기사 링크를 언론사 URL(canonical_link)로 해석한 뒤 언론사 URL 기준으로 중복을 다시 제거합니다.
+    selected 를 주면 그 기사들의 링크만 해석하고, 나머지 기사는 그대로 둡니다.
+    """
+    targets = articles if selected is None else selected
+    links = [article['link'] for article in targets if article.get('link') and not article.get('canonical_link')]
+    if not links:
+        return articles
+    resolved = resolver.resolve_many(links)
+    return dedupe_articles([
+        dict(article, canonical_link=resolved[article['link']])
+        if not article.get('canonical_link') and article.get('link') in resolved else article
+        for article in articles
+    ])
+
+def dedupe_articles(articles):
+    """
+    guid 또는 정규화된 링크가 이미 나온 기사를 제거합니다. 먼저 나온 기사가 남습니다.
+    """
+    seen = set()
+    unique = []
+    for article in articles:
+        keys = article_keys(article)
+        if any(key in seen for key in keys):
+            continue
+        seen.update(keys)
+        unique.append(article)
+    return unique
+
+class FeedFetcher:
+    """
+    피드별 ETag / Last-Modified 와 마지막 기사 목록을 기억하는 동시 RSS 수집기.
+    같은 인스턴스를 재사용해야 조건부 GET 효과가 있습니다.
+    """
+
+    def __init__(self, max_workers=8, timeout=15):
+        self.max_workers = max_workers
+        self.timeout = timeout  # 연결이 멈춘 피드 때문에 전체 수집이 끝나지 않는 일이 없도록 요청마다 제한합니다.
+        self.cache = {}  # rss_url -> {'etag', 'modified', 'articles'}
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch_one(self, keyword, region):
+        """
+        피드 하나를 조건부 GET 으로 가져옵니다. 304 응답이면 이전 기사 목록을 그대로 사용합니다.
+        feedparser.parse 는 시간 제한이 없으므로 요청은 세션으로 직접 보내고 응답 본문만 파싱합니다.
+        """
+        hl, gl, ceid = region
+        rss_url = build_rss_url(keyword, hl, gl, ceid)
+        with self.lock:
+            cached = self.cache.get(rss_url, {})
+        headers = {"User-Agent": USER_AGENT}
+        if cached.get('etag'):
+            headers["If-None-Match"] = cached['etag']
+        if cached.get('modified'):
+            headers["If-Modified-Since"] = cached['modified']
+        try:
+            response = self.session.get(rss_url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"RSS 조회 오류: {rss_url} ({e})")
+            return cached.get('articles', [])
+        if response.status_code == 304:
+            print(f"변경 없음 (304): {rss_url}")
+            return cached.get('articles', [])
+        if response.status_code != 200:
+            print(f"RSS 조회 오류: {rss_url} (HTTP {response.status_code})")
+            return cached.get('articles', [])
+        feed = feedparser.parse(response.content)
+        if feed.get('bozo') and not feed.entries:
+            print(f"RSS 조회 오류: {rss_url} ({feed.get('bozo_exception')})")
+            return cached.get('articles', [])
+        articles = []
+        for entry in feed.entries:
+            article = entry_to_article(entry)
+            article['keyword'] = keyword
+            article['region'] = gl
+            articles.append(article)
+        with self.lock:
+            self.cache[rss_url] = {
+                'etag': response.headers.get('ETag'),
+                'modified': response.headers.get('Last-Modified'),
+                'articles': articles
+            }
+        print(f"RSS 조회 완료: {rss_url} ({len(articles)}건)")
+        return articles
+
+    def fetch_all(self, keywords, regions, progress_callback=None):
+        """
+        모든 (검색어, 지역) 조합을 스레드 풀에서 동시에 가져와 중복을 제거한 기사 리스트를 반환합니다.
+        결과 순서는 완료 순서와 무관하게 (검색어, 지역) 입력 순서를 따릅니다.
+        :param progress_callback: (optional) 진행률 업데이트 콜백. (completed, total)
+        """
+        jobs = [(keyword, region) for keyword in keywords for region in regions]
+        results = [[] for _ in jobs]
+        completed = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_index = {
+                executor.submit(self.fetch_one, keyword, region): i
+                for i, (keyword, region) in enumerate(jobs)
+            }
+            for future in concurrent.futures.as_completed(future_to_index):
+                index = future_to_index[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"RSS 조회 오류: {jobs[index]} ({e})")
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, len(jobs))
+        return dedupe_articles([article for articles in results for article in articles])
@@ -0,0 +1,179 @@
+"""
+문장 임베딩을 float16 또는 int8(벡터별 스케일)로 압축 저장하고,
+압축된 상태 그대로 코사인 유사도를 계산하는 모듈.
+
+python news_quant.py 로 실행하면 고정된 합성 테스트 세트에서
+float32 대비 메모리 절감량과 유사도/순위 변화를 측정합니다.
+"""
+import sys
+import time
+
+import numpy as np       # 수치 계산용 라이브러리
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+class QuantizedEmbeddings:
+    """
+    (N, D) 임베딩 행렬을 압축 저장합니다.
+    int8 모드는 행마다 scale = max|v| / 127 을 두고 round(v / scale) 를 저장합니다.
+    코사인 계산에 필요한 scale / |v| 는 행별 계수(row_factor)로 미리 계산해 둡니다.
+    """
+
+    def __init__(self, matrix, mode="int8", block_rows=4096):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"지원하지 않는 저장 형식: {mode}")
+        matrix = np.asarray(matrix.numpy() if hasattr(matrix, "numpy") else matrix, dtype=np.float32)
+        self.mode = mode
+        self.block_rows = block_rows
+        if mode == "int8":
+            scale = (np.abs(matrix).max(axis=1) / 127.0).astype(np.float32)
+            scale[scale == 0] = 1.0
+            self.data = np.round(matrix / scale[:, None]).astype(np.int8)
+            self.scale = scale
+        else:
+            scale = np.ones(len(matrix), dtype=np.float32)
+            self.data = matrix.astype(mode)
+            self.scale = None
+        # 복원된 벡터 기준의 노름으로 나누어야 압축 오차가 있어도 코사인 범위가 유지됩니다.
+        norms = np.empty(len(matrix), dtype=np.float32)
+        for start, block in self._blocks():
+            norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        norms *= scale
+        with np.errstate(divide="ignore"):
+            self.row_factor = np.where(norms > 0, scale / norms, 0).astype(np.float32)
+
+    @classmethod
+    def from_parts(cls, data, row_factor, scale=None, mode="float32", block_rows=4096):
+        """
+        이미 압축된 배열(예: 메모리 맵 corpus 의 일부)로 객체를 만듭니다. 배열은 복사하지 않습니다.
+        """
+        self = cls.__new__(cls)
+        self.mode = mode
+        self.block_rows = block_rows
+        self.data = data
+        self.scale = scale
+        self.row_factor = row_factor
+        return self
+
+    def _blocks(self):
+        """
+        float32 로 변환한 행 블록을 차례로 내보냅니다. 임시 메모리는 block_rows 행으로 제한됩니다.
+        """
+        for start in range(0, len(self.data), self.block_rows):
+            yield start, self.data[start:start + self.block_rows].astype(np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.row_factor.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def similarities(self, query):
+        """
+        모든 행과 query 벡터의 코사인 유사도를 (N,) float32 배열로 반환합니다.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return np.zeros(len(self.data), dtype=np.float32)
+        if self.mode == "float32":
+            dots = self.data @ query
+        else:
+            dots = np.empty(len(self.data), dtype=np.float32)
+            for start, block in self._blocks():
+                dots[start:start + len(block)] = block @ query
+        return dots * self.row_factor / query_norm
+
+    def similarity_matrix(self, queries):
+        """
+        (N, D) query 행렬과 모든 행의 코사인 유사도를 (N, len(self)) float32 행렬로 반환합니다.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        query_norms = np.linalg.norm(queries, axis=1)
+        query_norms[query_norms == 0] = 1.0
+        if self.mode == "float32":
+            dots = queries @ self.data.T
+        else:
+            dots = np.empty((len(queries), len(self.data)), dtype=np.float32)
+            for start, block in self._blocks():
+                dots[:, start:start + len(block)] = queries @ block.T
+        return dots * self.row_factor / query_norms[:, None]
+
+    def numpy(self):
+        """
+        float32 로 복원한 (N, D) 행렬을 반환합니다.
+        """
+        restored = self.data.astype(np.float32)
+        if self.scale is not None:
+            restored *= self.scale[:, None]
+        return restored
+
+def quantize_pdf_data(pdf_data, mode="int8"):
+    """
+    pdf_data 의 sentence_embeddings 를 QuantizedEmbeddings 로, global_embedding 을 float32 numpy 배열로 바꿉니다.
+    float32 모드도 TF 텐서 대신 numpy 배열로 저장하여 텐서 오버헤드를 없앱니다.
+    """
+    for pdf in pdf_data:
+        emb = pdf['global_embedding']
+        pdf['global_embedding'] = np.asarray(emb.numpy() if hasattr(emb, "numpy") else emb, dtype=np.float32)
+        if pdf['sentence_embeddings'] is not None and not isinstance(pdf['sentence_embeddings'], QuantizedEmbeddings):
+            pdf['sentence_embeddings'] = QuantizedEmbeddings(pdf['sentence_embeddings'], mode)
+    return pdf_data
+
+def make_test_set(num_pdfs=40, num_sentences=300, num_headlines=300, dim=512, seed=0):
+    """
+    고정 시드의 합성 테스트 세트를 만듭니다. 헤드라인의 절반은 특정 PDF 문장에 잡음을 더해
+    만들어서, 실제처럼 명확한 정답 PDF가 있는 질의와 애매한 질의가 섞이도록 합니다.
+    """
+    rng = np.random.default_rng(seed)
+
+    def unit(x):
+        return (x / np.linalg.norm(x, axis=-1, keepdims=True)).astype(np.float32)
+
+    pdf_data = []
+    for i in range(num_pdfs):
+        topic = rng.normal(size=dim)
+        sentences = unit(topic + rng.normal(scale=1.5, size=(num_sentences, dim)))
+        pdf_data.append({
+            'file_path': f"synthetic_{i:03d}.pdf",
+            'text': "",
+            'global_embedding': unit(sentences.mean(axis=0)),
+            'sentence_embeddings': sentences
+        })
+    headlines = unit(rng.normal(size=(num_headlines, dim)))
+    for j in range(0, num_headlines, 2):
+        pdf = pdf_data[rng.integers(num_pdfs)]
+        sentence = pdf['sentence_embeddings'][rng.integers(num_sentences)]
+        headlines[j] = unit(sentence + rng.normal(scale=0.05, size=dim))
+    return pdf_data, headlines
+
+def measure(modes=STORAGE_MODES, top_k=10):
+    """
+    각 저장 형식에 대해 문장 임베딩 메모리, 채점 시간, float32 대비 점수/순위 변화를 출력합니다.
+    """
+    from news_core import compute_composite_similarity
+
+    reference = None
+    for mode in ["float32"] + [m for m in modes if m != "float32"]:
+        pdf_data, headlines = make_test_set()
+        quantize_pdf_data(pdf_data, mode)
+        memory = sum(pdf['sentence_embeddings'].nbytes for pdf in pdf_data)
+        started = time.perf_counter()
+        results = [compute_composite_similarity(h, pdf_data) for h in headlines]
+        elapsed = time.perf_counter() - started
+        scores = np.array([score for score, _ in results])
+        best = [best_pdf for _, best_pdf in results]
+        if reference is None:
+            reference = (memory, scores, best)
+        ref_memory, ref_scores, ref_best = reference
+        ref_top = set(np.argsort(-ref_scores)[:top_k])
+        top = set(np.argsort(-scores)[:top_k])
+        print(f"[{mode:>7}] 메모리 {memory / 1e6:7.2f} MB ({memory / ref_memory:5.1%}) | "
+              f"채점 {elapsed * 1000:7.1f} ms | "
+              f"최대 점수 차 {np.abs(scores - ref_scores).max():.5f} | "
+              f"Best PDF 일치 {np.mean([a == b for a, b in zip(best, ref_best)]):6.1%} | "
+              f"상위 {top_k} 헤드라인 일치 {len(top & ref_top)}/{top_k}")
+
+if __name__ == "__main__":
+    measure(sys.argv[1:] or STORAGE_MODES)
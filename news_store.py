@@ -0,0 +1,172 @@
+"""
+이미 본 뉴스 기사를 기억하는 영구 저장소 (SQLite).
+정규화된 링크(없으면 guid)를 키로 제목 임베딩과 복합 유사도를 캐시하여,
+새 기사만 임베딩하고 이미 텔레그램으로 보낸 기사는 다시 보내지 않습니다.
+"""
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np       # 수치 계산용 라이브러리
+
+from news_core import normalize_link, text_sha1, to_numpy, compute_composite_similarity_batch
+
+def article_key(article):
+    """
+    기사를 식별하는 키를 반환합니다. 정규화된 언론사 URL, 정규화된 링크, guid 순으로 사용합니다.
+    """
+    if article.get('canonical_link'):
+        return normalize_link(article['canonical_link'])
+    if article.get('link'):
+        return normalize_link(article['link'])
+    return article.get('guid', '')
+
+def corpus_signature(pdf_data):
+    """
+    PDF 코퍼스의 서명을 계산합니다. PDF 구성이 바뀌면 캐시된 유사도를 다시 계산합니다.
+    """
+    digest = hashlib.sha1()
+    for pdf in sorted(pdf_data, key=lambda p: p['file_path']):
+        digest.update(pdf['file_path'].encode('utf-8'))
+        digest.update(b"\0")
+        digest.update((pdf.get('text_sha1') or text_sha1(pdf['text'])).encode('ascii'))
+    return digest.hexdigest()
+
+class SeenArticleStore:
+    """
+    기사 키 -> (제목 임베딩, 유사도, 최고 기여 PDF, 전송 시각) 을 저장하는 SQLite 저장소.
+    GUI 워커 스레드와 메인 스레드에서 함께 사용할 수 있도록 잠금으로 보호합니다.
+    """
+
+    def __init__(self, path="seen_articles.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " key TEXT PRIMARY KEY,"
+            " title TEXT,"
+            " link TEXT,"
+            " embedding BLOB,"
+            " similarity REAL,"
+            " best_pdf TEXT,"
+            " corpus TEXT,"
+            " first_seen REAL,"
+            " sent_at REAL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """
+        여러 키에 대한 저장 내용을 {key: row dict} 로 반환합니다.
+        """
+        rows = {}
+        keys = list(keys)
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self.conn.execute(
+                    f"SELECT key, embedding, similarity, best_pdf, corpus, sent_at FROM articles WHERE key IN ({placeholders})",
+                    chunk
+                )
+                for key, embedding, similarity, best_pdf, corpus, sent_at in cursor:
+                    rows[key] = {
+                        'embedding': np.frombuffer(embedding, dtype=np.float32) if embedding else None,
+                        'similarity': similarity,
+                        'best_pdf': best_pdf,
+                        'corpus': corpus,
+                        'sent_at': sent_at
+                    }
+        return rows
+
+    def save_scores(self, articles, embeddings, corpus):
+        """
+        기사별 제목 임베딩과 유사도를 저장합니다. 전송 시각은 유지합니다.
+        """
+        now = time.time()
+        records = []
+        for article, embedding in zip(articles, embeddings):
+            blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+            records.append((
+                article_key(article), article['title'], article['link'], blob,
+                article.get('similarity'), article.get('best_pdf'), corpus, now
+            ))
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO articles (key, title, link, embedding, similarity, best_pdf, corpus, first_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET embedding=excluded.embedding, similarity=excluded.similarity,"
+                " best_pdf=excluded.best_pdf, corpus=excluded.corpus",
+                records
+            )
+            self.conn.commit()
+
+    def filter_unsent(self, articles):
+        """
+        아직 텔레그램으로 전송하지 않은 기사만 반환합니다.
+        """
+        rows = self.get_many(article_key(article) for article in articles)
+        return [article for article in articles
+                if not rows.get(article_key(article), {}).get('sent_at')]
+
+    def mark_sent(self, articles):
+        """
+        기사를 전송 완료로 표시합니다.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO articles (key, title, link, first_seen, sent_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET sent_at=excluded.sent_at",
+                [(article_key(a), a['title'], a['link'], now, now) for a in articles]
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def score_articles_cached(store, articles, embed, pdf_data, corpus=None):
+    """
+    기사마다 'similarity', 'best_pdf' 를 채운 새 딕셔너리 리스트를 반환합니다.
+    저장소에 제목 임베딩이 있으면 재사용하고, 같은 코퍼스로 계산된 유사도가 있으면 다시 계산하지 않습니다.
+    새 기사 제목만 한 번의 배치로 임베딩합니다.
+    """
+    if not articles:
+        return []
+    corpus = corpus or corpus_signature(pdf_data)
+    rows = store.get_many(article_key(article) for article in articles)
+    embeddings = [None] * len(articles)
+    missing = []
+    for i, article in enumerate(articles):
+        row = rows.get(article_key(article))
+        if row and row['embedding'] is not None:
+            embeddings[i] = row['embedding']
+        else:
+            missing.append(i)
+    if missing:
+        new_embeddings = embed([articles[i]['title'] for i in missing])
+        for i, embedding in zip(missing, new_embeddings):
+            embeddings[i] = to_numpy(embedding)
+    print(f"기사 {len(articles)}건 중 새로 임베딩한 기사 {len(missing)}건")
+
+    missing = set(missing)
+    changed = []
+    cached = {}
+    for i, article in enumerate(articles):
+        row = rows.get(article_key(article))
+        if i not in missing and row['corpus'] == corpus and row['similarity'] is not None:
+            cached[i] = (row['similarity'], row['best_pdf'])
+        else:
+            changed.append(i)
+    if changed:
+        # 다시 계산할 기사들은 PDF마다 한 번의 행렬 곱으로 채점합니다.
+        scores, best_pdfs = compute_composite_similarity_batch(np.stack([embeddings[i] for i in changed]), pdf_data)
+        for i, score, best_pdf in zip(changed, scores, best_pdfs):
+            cached[i] = (float(score), best_pdf)
+    scored = [dict(article, similarity=cached[i][0], best_pdf=cached[i][1]) for i, article in enumerate(articles)]
+    if changed:
+        store.save_scores([scored[i] for i in changed], [embeddings[i] for i in changed], corpus)
+    return scored
@@ -0,0 +1,134 @@
+"""
+data/ 폴더의 회사소개서 PDF 변경 감시 모듈.
+watchdog(inotify 등)이 설치되어 있으면 파일 시스템 이벤트로, 없으면 주기적인 폴링으로
+추가/변경/삭제된 PDF를 찾아 콜백으로 알려 줍니다. 바뀐 파일만 다시 임베딩하는 데 사용합니다.
+
+사용 예:
+    watcher = PDFFolderWatcher("data", lambda changed, removed: print(changed, removed))
+    watcher.start()
+"""
+import os
+import glob
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:      # watchdog 이 없으면 폴링으로 감시합니다.
+    Observer = None
+    FileSystemEventHandler = object
+
+def file_signature(file_path):
+    """
+    파일의 (수정 시각, 크기) 를 반환합니다. 파일이 없으면 None 을 반환합니다.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def scan_folder(folder):
+    """
+    폴더의 PDF 파일별 (수정 시각, 크기) 스냅샷을 반환합니다.
+    """
+    snapshot = {}
+    for file_path in glob.glob(os.path.join(folder, "*.pdf")):
+        signature = file_signature(file_path)
+        if signature is not None:  # 스캔 도중 삭제된 파일은 건너뜁니다.
+            snapshot[file_path] = signature
+    return snapshot
+
+def diff_snapshots(old, new):
+    """
+    두 스냅샷을 비교하여 (추가/변경된 경로 리스트, 삭제된 경로 리스트)를 반환합니다.
+    """
+    changed = sorted(path for path, signature in new.items() if old.get(path) != signature)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+class _WakeupHandler(FileSystemEventHandler):
+    """
+    watchdog 이벤트가 오면 감시 스레드를 깨웁니다. 어떤 파일이 바뀌었는지는 다시 스캔하여 판단합니다.
+    """
+
+    def __init__(self, event):
+        self.event = event
+
+    def on_any_event(self, event):
+        self.event.set()
+
+class PDFFolderWatcher:
+    """
+    폴더의 PDF 추가/변경/삭제를 감지하여 callback(changed, removed) 을 호출하는 감시기.
+    복사 중인 파일을 읽지 않도록, 크기와 수정 시각이 settle 초 동안 그대로일 때만 변경으로 알립니다.
+    콜백은 감시 스레드에서 호출됩니다.
+    """
+
+    def __init__(self, folder, callback, interval=2.0, settle=1.0, snapshot=None):
+        self.folder = folder
+        self.callback = callback
+        self.interval = interval
+        self.settle = settle
+        # snapshot 을 주면 그 시점 이후의 변경만 알립니다. (시작 시 이미 임베딩한 파일 목록)
+        self.snapshot = scan_folder(folder) if snapshot is None else snapshot
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.observer = None
+        self.thread = threading.Thread(target=self._run, name="PDFFolderWatcher", daemon=True)
+
+    def start(self):
+        if Observer is not None and os.path.isdir(self.folder):
+            self.observer = Observer()
+            self.observer.schedule(_WakeupHandler(self.wakeup), self.folder, recursive=False)
+            self.observer.start()
+            print(f"PDF 폴더 감시 시작 (watchdog): {self.folder}")
+        else:
+            print(f"PDF 폴더 감시 시작 ({self.interval}초 폴링): {self.folder}")
+        # 스냅샷을 찍은 뒤 감시를 시작하기 전(초기 임베딩 중)에 바뀐 파일은 이벤트가 없으므로, 첫 회는 바로 스캔합니다.
+        self.wakeup.set()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+
+    def poll(self):
+        """
+        폴더를 한 번 스캔하고, 안정된 변경이 있으면 콜백을 호출합니다.
+        아직 쓰는 중인 파일이 있으면 True 를 반환합니다.
+        """
+        current = scan_folder(self.folder)
+        changed, removed = diff_snapshots(self.snapshot, current)
+        if not changed and not removed:
+            return False
+        # settle 초 뒤에도 같은 상태인 파일만 완성된 것으로 봅니다.
+        self.stopped.wait(self.settle)
+        latest = scan_folder(self.folder)
+        ready = [path for path in changed if latest.get(path) == current[path]]
+        removed = [path for path in removed if path not in latest]
+        for path in ready:
+            self.snapshot[path] = current[path]
+        for path in removed:
+            del self.snapshot[path]
+        if ready or removed:
+            print(f"PDF 변경 감지: 추가/변경 {len(ready)}개, 삭제 {len(removed)}개")
+            try:
+                self.callback(ready, removed)
+            except Exception as e:
+                print(f"PDF 변경 처리 오류: {e}")
+        return len(ready) < len(changed)
+
+    def _run(self):
+        busy = False
+        while not self.stopped.is_set():
+            # watchdog 을 쓰면 이벤트가 올 때까지 기다리고, 쓰는 중인 파일이 있을 때만 짧게 다시 확인합니다.
+            timeout = self.interval if self.observer is None or busy else None
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+            if self.stopped.is_set():
+                break
+            busy = self.poll()
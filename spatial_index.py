@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+
+from coordinate import calculate_distance, get_accurate_radius_boundary
+
+class GridIndex:
+    # 위도/경도 점들을 일정한 크기(도 단위)의 격자 칸으로 나눠 저장하는 공간 색인
+    # 점은 칸 번호 순으로 정렬된 배열에 두고, 반경 검색은 get_accurate_radius_boundary 의 경계 상자에
+    # 걸치는 칸 범위만 np.searchsorted 로 꺼낸 뒤 하버사인 거리로 정확히 거릅니다.
+    # 새로 추가한 점은 버퍼에 모아 두었다가 merge_threshold 개가 넘으면 정렬 배열에 합칩니다.
+
+    def __init__(self, cell_size_m=1000, merge_threshold=4096):
+        self.cell_deg = cell_size_m / 111320
+        self.cols = int(math.ceil(360 / self.cell_deg)) + 1
+        self.rows = int(math.ceil(180 / self.cell_deg)) + 1
+        self.merge_threshold = merge_threshold
+        self.keys = np.empty(0, dtype=np.int64)
+        self.points = np.empty((0, 2))
+        self.ids = np.empty(0, dtype=np.int64)
+        self.pending_points = []
+        self.pending_ids = []
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.ids) + len(self.pending_ids)
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64), 0, self.rows - 1)
+
+    def _col(self, lng):
+        return np.floor((np.asarray(lng) + 180) / self.cell_deg).astype(np.int64) % self.cols
+
+    def insert(self, lat, lng, point_id=None):
+        # 점 하나를 추가하고 id 를 반환합니다. id 를 생략하면 추가한 순서대로 번호를 붙입니다.
+        return int(self.insert_many([[lat, lng]], None if point_id is None else [point_id])[0])
+
+    def insert_many(self, points, ids=None):
+        # (N, 2) [위도, 경도] 배열을 추가하고 id 배열을 반환합니다.
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if ids is None:
+            ids = np.arange(self.next_id, self.next_id + len(points), dtype=np.int64)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids):
+            self.next_id = max(self.next_id, int(ids.max()) + 1)
+        if len(points) >= self.merge_threshold:
+            self._merge(points, ids)
+        else:
+            self.pending_points.extend(points.tolist())
+            self.pending_ids.extend(ids.tolist())
+            if len(self.pending_ids) >= self.merge_threshold:
+                self._merge(np.empty((0, 2)), np.empty(0, dtype=np.int64))
+        return ids
+
+    def _merge(self, points, ids):
+        # 버퍼와 새 점을 정렬 배열에 합칩니다.
+        if self.pending_ids:
+            points = np.vstack((points, np.array(self.pending_points).reshape(-1, 2)))
+            ids = np.concatenate((ids, np.array(self.pending_ids, dtype=np.int64)))
+            self.pending_points = []
+            self.pending_ids = []
+        keys = self._row(points[:, 0]) * self.cols + self._col(points[:, 1])
+        keys = np.concatenate((self.keys, keys))
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.points = np.vstack((self.points, points))[order]
+        self.ids = np.concatenate((self.ids, ids))[order]
+
+    def _candidates(self, lat, lng, radius_m):
+        # 경계 상자에 걸치는 격자 칸의 점 위치(정렬 배열 인덱스)를 모읍니다. 위도 한 줄의 칸들은 연속 구간입니다.
+        box = get_accurate_radius_boundary(lat, lng, radius_m / 1000)
+        row_min, row_max = self._row(box['lat_min']), self._row(box['lat_max'])
+        if box['lng_max'] - box['lng_min'] >= 360:
+            col_ranges = [(0, self.cols - 1)]
+        else:
+            col_min, col_max = self._col(box['lng_min']), self._col(box['lng_max'])
+            # 날짜변경선(경도 180도)을 넘으면 두 구간으로 나눕니다.
+            col_ranges = [(col_min, col_max)] if col_min <= col_max else [(col_min, self.cols - 1), (0, col_max)]
+        starts, stops = [], []
+        for row in range(row_min, row_max + 1):
+            for col_min, col_max in col_ranges:
+                starts.append(row * self.cols + col_min)
+                stops.append(row * self.cols + col_max + 1)
+        lo = np.searchsorted(self.keys, starts, side='left')
+        hi = np.searchsorted(self.keys, stops, side='left')
+        if not len(lo):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)])
+
+    def radius_query(self, lat, lng, radius_m):
+        # 중심에서 radius_m(미터) 안에 있는 점들의 (id 배열, 거리 배열) 을 가까운 순으로 반환
+        index = self._candidates(lat, lng, radius_m)
+        points = self.points[index]
+        ids = self.ids[index]
+        if self.pending_ids:
+            points = np.vstack((points, np.array(self.pending_points).reshape(-1, 2)))
+            ids = np.concatenate((ids, np.array(self.pending_ids, dtype=np.int64)))
+        distance = np.atleast_1d(calculate_distance(lat, lng, points[:, 0], points[:, 1]))
+        inside = distance <= radius_m
+        ids, distance = ids[inside], distance[inside]
+        order = np.argsort(distance, kind='stable')
+        return ids[order], distance[order]
+
+    def knn(self, lat, lng, k=1, start_radius_m=None):
+        # 가장 가까운 점 k개의 (id 배열, 거리 배열). 검색 반경을 두 배씩 넓혀 가며 찾고,
+        # k번째 거리가 검색 반경 안이면 그보다 가까운 점이 반경 밖에 있을 수 없으므로 멈춥니다.
+        k = min(k, len(self))
+        radius = start_radius_m or self.cell_deg * 111320
+        while True:
+            ids, distance = self.radius_query(lat, lng, radius)
+            if len(ids) >= k or radius >= math.pi * 6371e3:
+                return ids[:k], distance[:k]
+            radius *= 2
@@ -0,0 +1,270 @@
+"""
+텔레그램 발송 대기열.
+메시지를 디스크(SQLite)에 먼저 저장한 뒤 백그라운드 스레드가 재사용 세션으로 전송합니다.
+텔레그램 전송 한도(채팅당 초당 1건, 전체 초당 30건)에 맞춰 간격을 두고,
+실패하면 지수 백오프로 재시도하며, 4096자를 넘는 메시지는 자동으로 나눕니다.
+GUI 와 헤드리스 다이제스트가 같은 대기열 파일을 함께 써도, 메시지마다 한 프로세스만
+전송권을 얻으므로(claimed_by) 중복 전송이나 서로의 대기열을 덮어쓰는 일이 없습니다.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+import contextlib
+
+import requests          # 텔레그램 API 호출용
+
+from news_core import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+
+MESSAGE_LIMIT = 4096
+GLOBAL_PACING_KEY = "*"  # pacing 테이블에서 전체 전송 간격을 기록하는 키
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """
+    메시지를 limit 글자 이하 조각으로 나눕니다.
+    문단(빈 줄) 경계를 우선 사용하고, 그래도 길면 줄 경계, 마지막으로 글자 수 기준으로 자릅니다.
+    """
+    if len(text) <= limit:
+        return [text]
+    # (앞 구분자, 조각) 목록을 만든 뒤 한도 안에서 차례로 채웁니다.
+    segments = []
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) <= limit:
+            segments.append(("\n\n", paragraph))
+            continue
+        for j, line in enumerate(paragraph.split("\n")):
+            separator = "\n" if j else "\n\n"
+            for start in range(0, max(len(line), 1), limit):
+                segments.append((separator if start == 0 else "", line[start:start + limit]))
+    parts = []
+    current = ""
+    for separator, segment in segments:
+        candidate = f"{current}{separator}{segment}" if current else segment
+        if len(candidate) <= limit:
+            current = candidate
+        else:
+            parts.append(current)
+            current = segment
+    if current:
+        parts.append(current)
+    return parts
+
+class TelegramOutbox:
+    """
+    디스크(SQLite)에 영속되는 텔레그램 발송 대기열.
+    프로그램이 중간에 종료되어도 다음 실행 때 남은 메시지부터 이어서 전송합니다.
+    여러 프로세스가 같은 파일을 쓰면, 채팅별 맨 앞 메시지를 먼저 차지한(claim) 프로세스만 전송합니다.
+    전송 중 종료된 프로세스의 메시지는 claim_timeout 초 뒤 다른 프로세스가 이어받습니다.
+    """
+
+    def __init__(self, path="telegram_outbox.db", bot_token=TELEGRAM_BOT_TOKEN,
+                 chat_interval=1.05, global_interval=1 / 30, max_backoff=600, max_attempts=20,
+                 claim_timeout=120, poll_interval=1.0, legacy_path="telegram_outbox.json"):
+        self.path = path
+        self.url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        self.chat_interval = chat_interval
+        self.global_interval = global_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval  # 다른 프로세스가 넣은 메시지를 확인하는 주기
+        self.owner = uuid.uuid4().hex  # 이 프로세스(대기열 객체)의 전송권 표시
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        # 트랜잭션은 직접 BEGIN IMMEDIATE 로 엽니다.
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " chat_id TEXT,"
+            " text TEXT,"
+            " parse_mode TEXT,"
+            " attempts INTEGER DEFAULT 0,"
+            " next_try REAL DEFAULT 0,"
+            " status TEXT DEFAULT 'pending',"
+            " last_error TEXT,"
+            " origin TEXT,"
+            " claimed_by TEXT,"
+            " claimed_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS messages_pending ON messages (status, chat_id, seq)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS pacing (chat_id TEXT PRIMARY KEY, last_sent REAL)")
+        if legacy_path:
+            self._import_legacy(legacy_path)
+        self.thread = threading.Thread(target=self._run, name="TelegramOutbox", daemon=True)
+        self.thread.start()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """
+        쓰기 잠금을 먼저 잡는 트랜잭션. lock 을 잡은 상태에서 사용해야 합니다.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _insert(self, conn, item, status="pending"):
+        conn.execute(
+            "INSERT INTO messages (chat_id, text, parse_mode, attempts, next_try, status, last_error, origin)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(item["chat_id"]), item["text"], item.get("parse_mode"), item.get("attempts", 0),
+             item.get("next_try", 0.0), status, item.get("last_error"), self.owner)
+        )
+
+    def _import_legacy(self, path):
+        """
+        이전 형식(JSON 파일) 대기열이 남아 있으면 옮겨 담고 파일을 지웁니다.
+        두 프로세스가 동시에 옮겨 담지 않도록 먼저 파일 이름을 바꿔 차지합니다.
+        """
+        claimed = f"{path}.{self.owner}"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return
+        try:
+            with open(claimed, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"텔레그램 대기열 로딩 오류: {e} ({claimed} 를 확인하세요)")
+            return
+        with self.lock, self._transaction() as conn:
+            for item in data.get("pending", []):
+                self._insert(conn, item)
+            for item in data.get("failed", []):
+                self._insert(conn, item, status="failed")
+        os.remove(claimed)
+        print(f"이전 텔레그램 대기열에서 {len(data.get('pending', []))}건을 옮겼습니다.")
+
+    def enqueue(self, message, chat_id=TELEGRAM_CHAT_ID, parse_mode="HTML"):
+        """
+        메시지를 한도에 맞게 나눠 대기열에 저장합니다. 실제 전송은 백그라운드에서 이루어집니다.
+        """
+        parts = split_message(message)
+        with self.lock:
+            with self._transaction() as conn:
+                for part in parts:
+                    self._insert(conn, {"chat_id": chat_id, "text": part, "parse_mode": parse_mode})
+            self.wakeup.notify()
+        print(f"텔레그램 대기열에 {len(parts)}개 메시지 추가 (대기 {self.pending()}건)")
+
+    def pending(self, own=False):
+        """
+        전송 대기 중인 메시지 수. own=True 이면 이 객체가 넣은 메시지만 셉니다.
+        """
+        query = "SELECT COUNT(*) FROM messages WHERE status = 'pending'"
+        args = ()
+        if own:
+            query += " AND origin = ?"
+            args = (self.owner,)
+        with self.lock:
+            return self.conn.execute(query, args).fetchone()[0]
+
+    def flush(self, timeout=None):
+        """
+        이 객체가 넣은 메시지가 모두 전송(또는 다른 프로세스가 전송)될 때까지 기다립니다.
+        시간 안에 모두 보냈으면 True 를 반환합니다.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending(own=True):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def _claim_next(self):
+        """
+        전송 시각이 된 채팅별 맨 앞 메시지 하나를 이 프로세스 몫으로 표시하고 반환합니다.
+        없으면 (None, 기다릴 시간) 을 반환합니다. 채팅별 순서를 지키기 위해, 맨 앞 메시지를
+        다른 프로세스가 전송 중인 채팅은 건너뜁니다. lock 을 잡은 상태에서 호출해야 합니다.
+        """
+        try:
+            with self._transaction() as conn:
+                now = time.time()
+                pacing = dict(conn.execute("SELECT chat_id, last_sent FROM pacing"))
+                last_global = pacing.get(GLOBAL_PACING_KEY, 0.0)
+                heads = conn.execute(
+                    "SELECT seq, chat_id, text, parse_mode, attempts, next_try, claimed_by, claimed_at"
+                    " FROM messages WHERE seq IN"
+                    " (SELECT MIN(seq) FROM messages WHERE status = 'pending' GROUP BY chat_id)"
+                    " ORDER BY seq"
+                ).fetchall()
+                wait = None
+                for seq, chat_id, text, parse_mode, attempts, next_try, claimed_by, claimed_at in heads:
+                    if claimed_by and claimed_by != self.owner and claimed_at > now - self.claim_timeout:
+                        continue
+                    ready_at = max(next_try,
+                                   pacing.get(chat_id, 0.0) + self.chat_interval,
+                                   last_global + self.global_interval)
+                    if ready_at <= now:
+                        conn.execute("UPDATE messages SET claimed_by = ?, claimed_at = ? WHERE seq = ?",
+                                     (self.owner, now, seq))
+                        return {"seq": seq, "chat_id": chat_id, "text": text, "parse_mode": parse_mode,
+                                "attempts": attempts}, 0
+                    wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                return None, wait
+        except sqlite3.OperationalError as e:
+            print(f"텔레그램 대기열 조회 오류: {e}")
+            return None, self.poll_interval
+
+    def _run(self):
+        while True:
+            with self.lock:
+                item, wait = self._claim_next()
+                while item is None:
+                    # 다른 프로세스가 넣은 메시지는 알림이 오지 않으므로 poll_interval 마다 다시 확인합니다.
+                    self.wakeup.wait(timeout=self.poll_interval if wait is None else min(wait, self.poll_interval))
+                    item, wait = self._claim_next()
+            self._deliver(item)
+
+    def _deliver(self, item):
+        payload = {"chat_id": item["chat_id"], "text": item["text"]}
+        if item["parse_mode"]:
+            payload["parse_mode"] = item["parse_mode"]
+        retry_after = None
+        try:
+            response = self.session.post(self.url, data=payload, timeout=(5, 30))
+            result = response.json()
+            if response.status_code == 200 and result.get("ok"):
+                print("텔레그램 전송 완료:", result.get("result", {}).get("message_id"))
+                with self.lock, self._transaction() as conn:
+                    self._mark_sent(conn, item)
+                    conn.execute("DELETE FROM messages WHERE seq = ?", (item["seq"],))
+                return
+            error = f"HTTP {response.status_code}: {result.get('description')}"
+            retry_after = result.get("parameters", {}).get("retry_after")
+            permanent = 400 <= response.status_code < 500 and response.status_code != 429
+        except (requests.RequestException, ValueError) as e:
+            error = str(e)
+            permanent = False
+
+        attempts = item["attempts"] + 1
+        status = "pending"
+        next_try = 0.0
+        if permanent or attempts >= self.max_attempts:
+            print(f"텔레그램 전송 실패 (보관): {error}")
+            status = "failed"
+        else:
+            backoff = retry_after or min(self.max_backoff, 2 ** attempts * random.uniform(0.8, 1.2))
+            next_try = time.time() + backoff
+            print(f"텔레그램 전송 실패, {backoff:.1f}초 후 재시도 ({attempts}회): {error}")
+        with self.lock, self._transaction() as conn:
+            self._mark_sent(conn, item)
+            conn.execute(
+                "UPDATE messages SET attempts = ?, last_error = ?, status = ?, next_try = ?,"
+                " claimed_by = NULL, claimed_at = NULL WHERE seq = ?",
+                (attempts, error, status, next_try, item["seq"])
+            )
+
+    def _mark_sent(self, conn, item):
+        now = time.time()
+        conn.executemany("INSERT OR REPLACE INTO pacing (chat_id, last_sent) VALUES (?, ?)",
+                         [(item["chat_id"], now), (GLOBAL_PACING_KEY, now)])